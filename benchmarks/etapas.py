@@ -0,0 +1,244 @@
+# ============================================================
+#     BENCHMARK POR ETAPA — MAQUINARIA / PROVIDENCIA IPSA
+# ============================================================
+#
+#   python benchmarks/etapas.py                       todos los escenarios
+#   python benchmarks/etapas.py --escenarios chico    uno solo
+#   python benchmarks/etapas.py --sin-png             sin navegador headless
+#
+# Genera una flota sintética por escenario (benchmarks/umbrales.json),
+# mide cada etapa por separado y escribe benchmarks/resultados.json con el
+# tiempo, las filas y el umbral de cada una. Sale con código 1 si alguna
+# etapa supera su umbral; "primera_falla" dice en qué escenario se rompe
+# cada etapa a medida que crece la flota.
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import tempfile
+
+import pandas as pd
+
+AQUI = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(AQUI))
+
+import ingesta  # noqa: E402
+import procesamiento  # noqa: E402
+from generar import generar  # noqa: E402
+
+UMBRALES = os.path.join(AQUI, "umbrales.json")
+RESULTADOS = os.path.join(AQUI, "resultados.json")
+
+
+def medir(funcion, repeticiones):
+    """
+    Mediana de `repeticiones` corridas. Devuelve (segundos, último resultado).
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+    return statistics.median(tiempos), resultado
+
+
+def filas(obj):
+    """
+    Tamaño de la salida: filas de la tabla (o de la primera de una tupla),
+    grupos en un dict por grupo.
+    """
+    if isinstance(obj, tuple):
+        obj = obj[0]
+    return len(obj) if hasattr(obj, "__len__") else None
+
+
+def correr_escenario(config, datos, repeticiones, con_png):
+    """
+    Mide todas las etapas del pipeline sobre una flota sintética.
+    Devuelve {etapa: {"segundos", "filas_entrada", "filas_salida"}}.
+    """
+    rutas = generar(datos, config["maquinas"], config["grupos"], config["dias"], config.get("semilla", 0))
+
+    ingesta.MAESTRO_RUTA = rutas["maestro"]
+    ingesta.CACHE_DIR = os.path.join(datos, "cache")
+
+    # Los grupos sintéticos heredan las metas de un grupo real
+    reales = list(procesamiento.METAS)
+    grupos = sorted(pd.read_csv(rutas["maestro"])["Grupo_trabajo"].unique())
+    for i, g in enumerate(grupos):
+        procesamiento.METAS.setdefault(g, procesamiento.METAS[reales[i % len(reales)]])
+
+    with open(rutas["xlsx"], "rb") as f:
+        contenido = f.read()
+
+    etapas = {}
+
+    def registrar(etapa, funcion, entrada, reps=repeticiones):
+        segundos, salida = medir(funcion, reps)
+        etapas[etapa] = {
+            "segundos": round(segundos, 4),
+            "filas_entrada": entrada,
+            "filas_salida": filas(salida),
+        }
+        return salida
+
+    # ===== INGESTA =====
+    df, _ = registrar("cargar_excel", lambda: ingesta.cargar_excel(io.BytesIO(contenido)), None)
+    df = registrar("unir_maestro", lambda: ingesta.unir_maestro(df), len(df))
+
+    # La entrada de caché que la ingesta lee en la próxima carga del mismo archivo
+    cache = ingesta.ruta_cache(ingesta.hash_archivo(io.BytesIO(contenido)))
+    ingesta.guardar_cache(df, cache)
+    registrar("leer_cache", lambda: ingesta.leer_cache(cache), None)
+
+    corridas = iter(range(repeticiones))
+
+    def historial_nuevo():
+        ingesta.HISTORIAL_DB = os.path.join(datos, f"historial-{next(corridas)}.sqlite")
+        if os.path.exists(ingesta.HISTORIAL_DB):
+            os.remove(ingesta.HISTORIAL_DB)
+        return ingesta.registrar_historial(df, "benchmark")
+
+    registrar("registrar_historial", historial_nuevo, len(df))
+
+    # ===== PREPARACIÓN =====
+    fecha_actual = df["Fecha de inicio"].max()
+
+    periodo = "Diario vs Semana"
+    df_actual, df_base, _ = registrar(
+        "analizar_periodo", lambda: procesamiento.analizar_periodo(fecha_actual, periodo), None
+    )
+    df_diag = registrar(
+        "diagnostico_flota", lambda: procesamiento.diagnostico_flota(df_actual, df_base), len(df_actual)
+    )
+    por_grupo, base, diag = registrar(
+        "particionar",
+        lambda: tuple(map(procesamiento.particionar, (df_actual, df_base, df_diag))),
+        len(df_actual) + len(df_base) + len(df_diag)
+    )
+    registrar(
+        "insights",
+        lambda: {g: procesamiento.insights_periodo(diag, g, periodo) for g in grupos},
+        len(df_diag)
+    )
+
+    # ===== GRÁFICOS Y EXPORTACIÓN =====
+    from graficos import grafico_diario
+
+    _, semana = ingesta.fecha_referencia(df)
+
+    def graficos_todos():
+        return {
+            g: grafico_diario(
+                por_grupo, base, g,
+                procesamiento.METAS[g]["func"], procesamiento.METAS[g]["ralenti"],
+                periodo, semana
+            )
+            for g in por_grupo
+        }
+
+    figuras = registrar("grafico_diario", graficos_todos, len(df_actual))
+
+    if con_png:
+        from exportar import exportar_reporte_png
+
+        g = max(por_grupo, key=lambda k: len(por_grupo[k]))
+        insights = procesamiento.insights_periodo(df_diag, g, periodo)
+        try:
+            registrar(
+                "exportar_reporte_png",
+                lambda: exportar_reporte_png(figuras[g], insights, g),
+                len(por_grupo[g]),
+                reps=1
+            )
+        except Exception as e:  # sin Chrome/kaleido no hay render
+            etapas["exportar_reporte_png"] = {"omitida": f"{type(e).__name__}: {e}"[:200]}
+
+    return etapas
+
+
+def evaluar(resultados, umbrales):
+    """
+    Marca cada etapa como ok/excede y devuelve, por etapa, el primer
+    escenario (en orden de tamaño) donde supera su umbral.
+    """
+    primera_falla = {}
+
+    for escenario, etapas in resultados.items():
+        for etapa, r in etapas.items():
+            umbral = umbrales.get(etapa, {}).get(escenario)
+            if "segundos" not in r or umbral is None:
+                continue
+            r["umbral"] = umbral
+            r["estado"] = "ok" if r["segundos"] <= umbral else "excede"
+            if r["estado"] == "excede":
+                primera_falla.setdefault(etapa, escenario)
+
+    return primera_falla
+
+
+def main(argv=None):
+    with open(UMBRALES, encoding="utf-8") as f:
+        config = json.load(f)
+
+    parser = argparse.ArgumentParser(description="Benchmark por etapa sobre flotas sintéticas.")
+    parser.add_argument("--escenarios", nargs="*", choices=list(config["escenarios"]))
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--sin-png", action="store_true", help="omite exportar_reporte_png")
+    parser.add_argument("--datos", help="carpeta para los archivos generados (por defecto temporal)")
+    parser.add_argument("--salida", default=RESULTADOS)
+    args = parser.parse_args(argv)
+
+    escenarios = args.escenarios or list(config["escenarios"])
+    resultados = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for nombre in escenarios:
+            datos = os.path.join(args.datos or tmp, nombre)
+            print(f"== {nombre}: {config['escenarios'][nombre]}")
+            resultados[nombre] = correr_escenario(
+                config["escenarios"][nombre], datos, args.repeticiones, not args.sin_png
+            )
+
+    primera_falla = evaluar(resultados, config["etapas"])
+
+    for nombre, etapas in resultados.items():
+        print(f"\n{nombre}")
+        for etapa, r in etapas.items():
+            if "omitida" in r:
+                print(f"  {etapa:<22} omitida ({r['omitida']})")
+                continue
+            print(
+                f"  {etapa:<22} {r['segundos']:8.4f} s"
+                f"  / {r.get('umbral', float('nan')):6.2f} s  {r.get('estado', '-')}"
+            )
+
+    informe = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "entorno": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "escenarios": {n: config["escenarios"][n] for n in escenarios},
+        "resultados": resultados,
+        "primera_falla": primera_falla,
+    }
+
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, ensure_ascii=False, indent=2)
+
+    if primera_falla:
+        print("\nUmbral superado: " + ", ".join(f"{e} ({n})" for e, n in primera_falla.items()))
+
+    return 1 if primera_falla else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# ============================================================
+#     GENERADOR SINTÉTICO — EXPORTS DE OPERATION CENTER
+# ============================================================
+#
+#   python benchmarks/generar.py --maquinas 500 --grupos 6 --dias 31 --salida /tmp/flota
+#
+# Escribe un maestro (CSV) y un export (.xlsx y .parquet) con los nombres
+# de columna reales, reproducibles por semilla.
+
+import os
+import sys
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from ingesta import COLUMNAS_MAESTRO, COLUMNAS_PCT, COLUMNAS_HORAS, FORMATO_FECHA  # noqa: E402
+from procesamiento import METAS  # noqa: E402
+
+# Columnas que el export trae y el panel no usa (el lector debe saltarlas)
+COLUMNAS_RELLENO = [
+    "Organización", "Fecha de finalización", "Modelo de la máquina",
+    "Consumo de combustible (l)", "Distancia recorrida (km)",
+    "Velocidad media (km/h)", "Área trabajada (ha)", "Operador",
+]
+
+MODELOS = ["6170J", "6190J", "7230J", "8R 340", "9RX 640", "CH570"]
+
+
+def nombres_grupos(grupos):
+    """
+    Grupos reales primero; si se piden más, grupos numerados.
+    """
+    reales = list(METAS)
+    return reales[:grupos] + [f"Grupo {i + 1}" for i in range(len(reales), grupos)]
+
+
+def generar_maestro(maquinas, grupos, semilla=0):
+    """
+    Maestro con `maquinas` máquinas repartidas entre `grupos` grupos.
+    """
+    rng = np.random.default_rng(semilla)
+    nombres = nombres_grupos(grupos)
+
+    ids = [f"{900000 + i}-{'NPSC'[i % 4]}" for i in range(maquinas)]
+    return pd.DataFrame({
+        "Máquina": ids,
+        "Modelo": rng.choice(MODELOS, maquinas),
+        "Tipo": "Tractor",
+        "Número de serie de la máquina": [f"1BM{i:014d}" for i in rng.integers(0, 10 ** 14, maquinas)],
+        "Grupo_trabajo": [nombres[i % len(nombres)] for i in range(maquinas)],
+    })[COLUMNAS_MAESTRO]
+
+
+def generar_export(maestro, dias, hasta=date(2026, 10, 14), sin_maestro=0.02, semilla=0):
+    """
+    Export de Operation Center: una fila por máquina y día durante `dias`
+    días hasta `hasta`. Una fracción `sin_maestro` de máquinas no está en
+    el maestro, como pasa con equipos nuevos.
+    """
+    rng = np.random.default_rng(semilla + 1)
+
+    maquinas = list(maestro["Máquina"])
+    extra = int(round(len(maquinas) * sin_maestro))
+    maquinas += [f"NUEVA-{i}" for i in range(extra)]
+
+    fechas = [hasta - timedelta(days=d) for d in range(dias - 1, -1, -1)]
+    n = len(maquinas) * len(fechas)
+
+    func = rng.uniform(0.45, 0.92, n)
+    ral = rng.uniform(0.03, 0.35, n) * (1 - func)
+    trans = np.clip(1 - func - ral, 0, None)
+    motor = rng.uniform(2, 22, n)
+
+    texto_fecha = np.repeat([f.strftime(FORMATO_FECHA) for f in fechas], len(maquinas))
+
+    df = pd.DataFrame({
+        "Organización": "Providencia",
+        "Máquina": np.tile(maquinas, len(fechas)),
+        "Fecha de inicio": texto_fecha,
+        "Fecha de finalización": texto_fecha,
+        "Modelo de la máquina": rng.choice(MODELOS, n),
+        COLUMNAS_PCT[0]: func,
+        COLUMNAS_PCT[1]: trans,
+        COLUMNAS_PCT[2]: ral,
+        COLUMNAS_HORAS[0]: func * motor,
+        COLUMNAS_HORAS[1]: trans * motor,
+        COLUMNAS_HORAS[2]: ral * motor,
+        COLUMNAS_HORAS[3]: motor,
+        "Consumo de combustible (l)": motor * rng.uniform(8, 25, n),
+        "Distancia recorrida (km)": trans * motor * rng.uniform(5, 20, n),
+        "Velocidad media (km/h)": rng.uniform(3, 18, n),
+        "Área trabajada (ha)": func * motor * rng.uniform(0.5, 3, n),
+        "Operador": rng.choice(["A. Gómez", "L. Martínez", "J. Rojas", "C. Díaz"], n),
+    })
+
+    return df.round(4)
+
+
+def escribir_xlsx(df, ruta):
+    """
+    Excel como lo entrega Operation Center (una hoja, encabezado en la fila 1).
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(df.columns))
+    for fila in df.itertuples(index=False, name=None):
+        ws.append(fila)
+    wb.save(ruta)
+
+
+def generar(salida, maquinas, grupos, dias, semilla=0):
+    """
+    Escribe maestro.csv, export.xlsx y export.parquet en `salida`.
+    Devuelve las rutas.
+    """
+    os.makedirs(salida, exist_ok=True)
+
+    maestro = generar_maestro(maquinas, grupos, semilla)
+    export = generar_export(maestro, dias, semilla=semilla)
+
+    rutas = {
+        "maestro": os.path.join(salida, "maestro.csv"),
+        "xlsx": os.path.join(salida, "export.xlsx"),
+        "parquet": os.path.join(salida, "export.parquet"),
+    }
+    maestro.to_csv(rutas["maestro"], index=False)
+    escribir_xlsx(export, rutas["xlsx"])
+    export.to_parquet(rutas["parquet"], index=False)
+
+    return rutas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un export sintético de Operation Center.")
+    parser.add_argument("--maquinas", type=int, default=100)
+    parser.add_argument("--grupos", type=int, default=4)
+    parser.add_argument("--dias", type=int, default=7)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--salida", default="flota_sintetica")
+    args = parser.parse_args(argv)
+
+    for tipo, ruta in generar(args.salida, args.maquinas, args.grupos, args.dias, args.semilla).items():
+        print(f"{tipo:<8} {ruta}")
+
+
+if __name__ == "__main__":
+    main()
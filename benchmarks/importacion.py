@@ -0,0 +1,98 @@
+# ============================================================
+#     PRESUPUESTO DE IMPORTACIÓN — MAQUINARIA / PROVIDENCIA IPSA
+# ============================================================
+#
+#   python benchmarks/importacion.py [--repeticiones 5]
+#
+# Importa cada módulo en un intérprete nuevo y compara el tiempo contra
+# `import pandas, numpy` (la base que ningún módulo puede evitar); el
+# margen de cada módulo está en benchmarks/umbrales.json.
+# Falla (código 1) si un módulo supera su presupuesto o si carga
+# dependencias pesadas que deberían importarse solo al usarse.
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BASE = "pandas, numpy"
+
+PESADOS = ["streamlit", "plotly", "openpyxl", "kaleido", "PIL"]
+
+# Segundos sobre la base por módulo: benchmarks/umbrales.json ("importacion")
+UMBRALES = os.path.join(RAIZ, "benchmarks", "umbrales.json")
+
+# módulo -> módulos que no debe cargar al importarse
+PROHIBIDOS = {
+    "ingesta": PESADOS,
+    "procesamiento": PESADOS,
+    "graficos": PESADOS,
+    "exportar": PESADOS,
+    "lote": PESADOS,
+    "vigilante": PESADOS,
+    # Streamlit es la base del panel; Plotly Express y la exportación no.
+    "maquinaria": ["plotly.express", "openpyxl", "kaleido"],
+}
+
+SONDA = """
+import sys, time, json
+t0 = time.perf_counter()
+import {modulo}
+t = time.perf_counter() - t0
+print(json.dumps({{"segundos": t, "modulos": sorted(sys.modules)}}))
+"""
+
+
+def medir(modulo, repeticiones):
+    """
+    Mediana del tiempo de importación en intérpretes nuevos
+    y módulos cargados en la última corrida.
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        r = subprocess.run(
+            [sys.executable, "-c", SONDA.format(modulo=modulo)],
+            cwd=RAIZ, capture_output=True, text=True, check=True
+        )
+        datos = json.loads(r.stdout.strip().splitlines()[-1])
+        tiempos.append(datos["segundos"])
+
+    return statistics.median(tiempos), set(datos["modulos"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de importación por módulo.")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    base, _ = medir(BASE, args.repeticiones)
+    print(f"{'base (' + BASE + ')':<28} {base:6.3f} s")
+
+    with open(UMBRALES, encoding="utf-8") as f:
+        presupuesto = json.load(f)["importacion"]
+
+    fallas = []
+    for modulo, margen in presupuesto.items():
+        prohibidos = PROHIBIDOS.get(modulo, PESADOS)
+        t, cargados = medir(modulo, args.repeticiones)
+        extra = t - base
+        indebidos = [p for p in prohibidos if p in cargados]
+
+        ok = extra <= margen and not indebidos
+        print(
+            f"{modulo:<28} {t:6.3f} s  ({extra:+.3f} / {margen:.2f} s)"
+            f"{'  carga ' + ', '.join(indebidos) if indebidos else ''}"
+            f"  {'OK' if ok else 'FALLA'}"
+        )
+        if not ok:
+            fallas.append(modulo)
+
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# ============================================================
+#     EXPORTACIÓN DE REPORTES (PNG / PDF) — MAQUINARIA / PROVIDENCIA IPSA
+# ============================================================
+# Plotly, kaleido y Pillow se importan al exportar, no al cargar el módulo.
+
+import os
+import threading
+
+from graficos import PRIMARY
+
+
+REPORTE_ANCHO = 1800
+REPORTE_ALTO = 950
+
+# Pestañas del navegador headless: fijas por proceso (kaleido ignora el
+# número al volver a arrancar el servidor), sin depender de qué
+# exportación llegue primero
+PESTANAS = int(os.environ.get("MAQUINARIA_PESTANAS", "0")) or os.cpu_count() or 1
+
+
+def componer_reporte(fig, insights, grupo):
+    """
+    Lámina ejecutiva en una sola figura Plotly:
+    - gráfico a la izquierda
+    - panel de insights a la derecha
+    Así todo se rasteriza en un solo render, sin HTML intermedio.
+    """
+    import textwrap
+    import plotly.graph_objects as go
+
+    rep = go.Figure(fig)
+
+    lineas = []
+    for ins in insights:
+        lineas.extend(textwrap.wrap(ins, width=58) or [""])
+        lineas.append("")
+
+    texto = (
+        f"<b><span style='color:{PRIMARY}; font-size:18px'>🧭 Diagnóstico Operativo</span></b><br>"
+        f"<b><span style='font-size:16px'>{grupo}</span></b><br><br>"
+        + "<br>".join(lineas)
+    )
+
+    rep.update_layout(
+        width=REPORTE_ANCHO,
+        height=REPORTE_ALTO,
+        xaxis=dict(domain=[0, 0.66]),
+        margin=dict(l=50, r=30, t=80, b=120),
+    )
+
+    rep.add_shape(
+        type="rect",
+        xref="paper", yref="paper",
+        x0=0.71, x1=1.0, y0=-0.05, y1=1.05,
+        line=dict(color=PRIMARY, width=3),
+        fillcolor="#F8F9F7",
+        layer="below"
+    )
+
+    rep.add_annotation(
+        xref="paper", yref="paper",
+        x=0.72, y=1.03,
+        xanchor="left", yanchor="top",
+        align="left",
+        showarrow=False,
+        text=texto,
+        font=dict(family="Arial, sans-serif", size=13, color="#000")
+    )
+
+    return rep
+
+
+_RENDERIZADOR = {"lock": threading.Lock(), "iniciado": False}
+
+
+def iniciar_renderizador():
+    """
+    Arranca (una sola vez por proceso) el navegador headless de kaleido con
+    PESTANAS pestañas. Las siguientes exportaciones reutilizan ese proceso.
+    Sin Chrome el servidor de kaleido muere en su hilo y el render queda
+    esperando para siempre, así que se verifica antes de arrancarlo.
+    """
+    estado = _RENDERIZADOR
+
+    with estado["lock"]:
+        if estado["iniciado"]:
+            return
+
+        import kaleido
+        from choreographer.browsers.chromium import Chromium
+
+        if Chromium.find_browser(skip_local=False) is None:
+            raise RuntimeError(
+                "No se encontró Chrome para exportar imágenes. "
+                "Instálelo con `kaleido_get_chrome` o defina BROWSER_PATH."
+            )
+
+        kaleido.start_sync_server(n=PESTANAS, silence_warnings=True)
+        estado["iniciado"] = True
+
+
+def exportar_reporte_png(fig, insights, grupo):
+    """
+    PNG ejecutivo de un grupo, en memoria (bytes).
+    """
+    iniciar_renderizador()
+    return _renderizar_png(fig, insights, grupo)
+
+
+def _renderizar_png(fig, insights, grupo):
+    """
+    Render de una lámina con el renderizador ya iniciado.
+    """
+    import plotly.io as pio
+
+    return pio.to_image(
+        componer_reporte(fig, insights, grupo),
+        format="png",
+        width=REPORTE_ANCHO,
+        height=REPORTE_ALTO,
+        scale=2
+    )
+
+
+def exportar_lote(reportes, formato="zip", workers=None):
+    """
+    Exporta varios grupos de una vez.
+    reportes: lista de (grupo, fig, insights).
+    Los renders se reparten entre las pestañas del renderizador persistente
+    (un hilo por pestaña como máximo) y las imágenes viajan en memoria.
+    Devuelve los bytes de un .zip con un PNG por grupo o de un .pdf de
+    varias páginas.
+    """
+    import io
+    import zipfile
+    from concurrent.futures import ThreadPoolExecutor
+
+    workers = workers or min(len(reportes), PESTANAS) or 1
+    iniciar_renderizador()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pngs = list(pool.map(
+            lambda r: _renderizar_png(r[1], r[2], r[0]),
+            reportes
+        ))
+
+    salida = io.BytesIO()
+
+    if formato == "pdf":
+        from PIL import Image
+
+        paginas = [Image.open(io.BytesIO(png)).convert("RGB") for png in pngs]
+        if paginas:
+            paginas[0].save(salida, format="PDF", save_all=True, append_images=paginas[1:])
+    else:
+        with zipfile.ZipFile(salida, "w", zipfile.ZIP_STORED) as z:
+            for (grupo, _, _), png in zip(reportes, pngs):
+                nombre = f"reporte_{grupo}.png".replace(" ", "_").replace("/", "_")
+                z.writestr(nombre, png)
+
+    return salida.getvalue()
@@ -0,0 +1,439 @@
+# ============================================================
+#     GRÁFICOS — ANALÍTICA MAQUINARIA / PROVIDENCIA IPSA
+# ============================================================
+# Plotly se importa dentro de cada función: cargar este módulo no
+# arrastra plotly.graph_objects / plotly.express hasta el primer gráfico.
+
+import os
+import json
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import numpy as np
+
+from medicion import SIN_REGISTRO
+from procesamiento import (
+    METAS,
+    TIPOS,
+    COLUMNAS_HORAS_TIPO,
+    insights_periodo,
+    preparar_promedio_semanal,
+    tramo,
+)
+
+
+# ============================================================
+# 1. COLORES CORPORATIVOS
+# ============================================================
+
+PRIMARY = "#1A7335"      # Verde caña
+SECONDARY = "#F2C14E"    # Amarillo caña
+ACCENT = "#3E92CC"       # Azul corporativo
+GRAY = "#555555"
+BG = "#FAFAFA"
+
+
+# ============================================================
+# 2. GRÁFICO DIARIO
+# ============================================================
+
+def grafico_diario(tabla, df_base, grupo, meta_func, meta_ralenti, periodo, semana_ref):
+    """
+    Barras del período actual sobre el promedio de la base
+    (semana para 'Diario vs Semana', mes para 'Semana vs Mes').
+    Trazado compacto: una traza por serie con colores y etiquetas por punto,
+    metas como shapes del layout. El número de trazas no crece con la flota.
+    Trabaja sobre la tabla ancha: cada serie es una columna, sin filtros por Tipo.
+    tabla y df_base pueden venir particionadas por grupo (PorGrupo).
+    """
+
+    import plotly.graph_objects as go
+
+    # ===== COLORES =====
+    COLOR_FUNC = "#32CD32"
+    COLOR_TRANS = "#A6A6A6"
+    COLOR_RALENTI = "#FF8C00"
+    COLOR_META_F = "#006400"
+    COLOR_META_R = "#CC5500"
+
+    COLOR_PFUNC = "#037403"
+    COLOR_PRAL = "#613703"
+    COLOR_PTRAS = "#777777"
+
+    # ===== FILTRAR GRUPO (una fila por máquina) =====
+    d = (
+        tramo(tabla, grupo)
+        .groupby("Máquina", observed=True, sort=False)
+        [TIPOS + list(COLUMNAS_HORAS_TIPO.values())]
+        .mean()
+    )
+
+    # ===== EJE X NUMÉRICO =====
+    maquinas = list(d.index)
+    x = np.arange(len(maquinas), dtype="float32")
+
+    OFFSET = {
+        "Funcionamiento": -0.25,
+        "Ralenti": 0.0,
+        "Transporte": 0.25
+    }
+
+    COLORS_BAR = {
+        "Funcionamiento": COLOR_FUNC,
+        "Ralenti": COLOR_RALENTI,
+        "Transporte": COLOR_TRANS
+    }
+
+    COLORS_PT = {
+        "Funcionamiento": COLOR_PFUNC,
+        "Ralenti": COLOR_PRAL,
+        "Transporte": COLOR_PTRAS
+    }
+
+    def series(valores):
+        """
+        Apila una columna por Tipo en un solo arreglo (x, y, código de color).
+        """
+        xs = np.concatenate([x + OFFSET[t] for t in TIPOS])
+        ys = np.concatenate([valores[t] for t in TIPOS]).astype("float32")
+        codigos = np.repeat(np.arange(len(TIPOS), dtype="int8"), len(x))
+        return xs, ys, codigos
+
+    def colores(codigos, paleta):
+        """
+        Color por punto como código numérico + escala discreta
+        (más liviano en el JSON que un arreglo de strings).
+        """
+        escala = [[i / (len(TIPOS) - 1), paleta[t]] for i, t in enumerate(TIPOS)]
+        return dict(color=codigos, colorscale=escala, cmin=0, cmax=len(TIPOS) - 1)
+
+    if periodo == "Diario vs Semana":
+        titulo_fig = f"Tiempos de operación — Diario | {grupo} | Semana {semana_ref}"
+        etiqueta_prom = "Promedio semanal"
+    else:
+        titulo_fig = f"Tiempos de operación — Semanal | {grupo}| Semana  {semana_ref}"
+        etiqueta_prom = "Promedio mensual"
+
+    fig = go.Figure()
+
+    # ======================================================
+    # 0. BARRAS PROMEDIO DE LA BASE (FONDO) — una traza
+    # ======================================================
+    base = preparar_promedio_semanal(df_base, grupo).reindex(maquinas)
+    xw, yw, cw = series({t: base[t].to_numpy() for t in TIPOS})
+
+    fig.add_trace(go.Bar(
+        x=xw,
+        y=yw,
+        marker=colores(cw, COLORS_BAR),
+        opacity=0.50,
+        width=0.38,
+        name=etiqueta_prom
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=xw + 0.06,
+        y=yw,
+        mode="text",
+        texttemplate="%{y:.0f}",
+        textfont=dict(color="#444444", size=8),
+        showlegend=False,
+        hoverinfo="skip"
+    ))
+
+    # ======================================================
+    # 1. BARRAS DIARIAS (%) — una traza por Tipo (leyenda)
+    # ======================================================
+    for tipo in TIPOS:
+        fig.add_trace(go.Bar(
+            x=x + OFFSET[tipo],
+            y=d[tipo].to_numpy(dtype="float32"),
+            marker_color=COLORS_BAR[tipo],
+            texttemplate="%{y:.0f}",
+            textposition="outside",
+            textfont=dict(color="black"),
+            width=0.22,
+            name=tipo
+        ))
+
+    # ======================================================
+    # 2. PUNTOS DE HORAS (EJE SECUNDARIO) — una traza
+    # ======================================================
+    xh, yh, ch = series({t: d[COLUMNAS_HORAS_TIPO[t]].to_numpy() for t in TIPOS})
+
+    fig.add_trace(go.Scatter(
+        x=xh,
+        y=yh,
+        yaxis="y2",
+        mode="markers+text",
+        texttemplate="%{y:.1f}",
+        textposition="bottom center",
+        textfont=dict(color="black"),
+        marker=dict(
+            size=6,
+            line=dict(color="black", width=0.5),
+            **colores(ch, COLORS_PT)
+        ),
+        showlegend=False
+    ))
+
+    # ======================================================
+    # 3. HORAS MOTOR (EJE SECUNDARIO)
+    # ======================================================
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=d["Horas_Motor"].to_numpy(dtype="float32"),
+        yaxis="y2",
+        mode="markers+text",
+        texttemplate="%{y:.1f}",
+        textposition="top center",
+        marker=dict(color="red", size=13),
+        textfont=dict(color="red"),
+        name="Horas motor"
+    ))
+
+    # ======================================================
+    # 4. LÍNEAS DE META (%) — shapes del layout
+    # ======================================================
+    for meta, color in [(meta_func, COLOR_META_F), (meta_ralenti, COLOR_META_R)]:
+        fig.add_hline(
+            y=meta,
+            line=dict(color=color, dash="dash", width=2),
+            annotation_text=f"{meta}%",
+            annotation_position="right",
+            annotation_font_color=color
+        )
+
+    # ======================================================
+    # 5. LAYOUT (EJE SECUNDARIO)
+    # ======================================================
+    horas_max = np.nanmax(d[list(COLUMNAS_HORAS_TIPO.values())].to_numpy(dtype=float), initial=0)
+
+    fig.update_layout(
+        height=650,
+        template="simple_white",
+        barmode="overlay",
+        title=titulo_fig,
+
+        yaxis=dict(
+            title="% Tiempo",
+            range=[0, 100]
+        ),
+
+        yaxis2=dict(
+            title="Horas",
+            linecolor="red",
+            tickcolor="red",
+            overlaying="y",
+            side="right",
+            range=[0, horas_max * 1.15],  # ← empieza en 0
+            showgrid=False
+        ),
+
+        legend=dict(orientation="h", y=-0.25),
+        margin=dict(l=50, r=60, t=80, b=120)
+    )
+
+    fig.update_xaxes(
+        tickmode="array",
+        tickvals=x.tolist(),
+        ticktext=maquinas,
+        range=[-0.6, len(maquinas) - 0.4],
+        title_text="Máquina"
+    )
+
+    return fig
+
+
+# ------------------------------------------------------------
+# CACHÉ DE FIGURAS — evita reconstruir gráficos en cada rerun
+# ------------------------------------------------------------
+
+class CacheFiguras:
+    """
+    LRU acotado de figuras serializadas (JSON), compartido entre sesiones.
+    """
+
+    def __init__(self, max_items=64):
+        self.max_items = max_items
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def buscar(self, clave):
+        """
+        Valor guardado, o None (sin construirlo).
+        """
+        with self._lock:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                return self._datos[clave]
+        return None
+
+    def obtener(self, clave, construir):
+        valor = self.buscar(clave)
+        if valor is not None:
+            return valor
+
+        valor = construir()
+
+        with self._lock:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_items:
+                self._datos.popitem(last=False)
+
+        return valor
+
+
+_CACHE_FIGURAS = {"lock": threading.Lock(), "cache": None}
+
+
+def cache_figuras():
+    """
+    Caché de figuras del proceso, compartida entre sesiones.
+    """
+    with _CACHE_FIGURAS["lock"]:
+        if _CACHE_FIGURAS["cache"] is None:
+            _CACHE_FIGURAS["cache"] = CacheFiguras(int(os.environ.get("MAQUINARIA_CACHE_FIGURAS", "64")))
+        return _CACHE_FIGURAS["cache"]
+
+
+def huella(*dfs):
+    """
+    Huella barata del contenido de uno o varios DataFrames.
+    """
+    h = hashlib.sha256()
+    for df in dfs:
+        h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        h.update(b"|")
+    return h.hexdigest()
+
+
+def clave_figura(tabla, df_base, grupo, meta_func, meta_ralenti, periodo, semana_ref):
+    """
+    Clave de caché: huella del tramo del grupo más grupo, período y metas.
+    """
+    return (
+        huella(tramo(tabla, grupo), tramo(df_base, grupo)),
+        grupo, periodo, meta_func, meta_ralenti, semana_ref
+    )
+
+
+def figura_diario(tabla, df_base, grupo, meta_func, meta_ralenti, periodo, semana_ref):
+    """
+    grafico_diario memorizado. Devuelve la figura como dict (JSON).
+    """
+    fig_json = cache_figuras().obtener(
+        clave_figura(tabla, df_base, grupo, meta_func, meta_ralenti, periodo, semana_ref),
+        lambda: grafico_diario(
+            tabla, df_base, grupo,
+            meta_func, meta_ralenti, periodo, semana_ref
+        ).to_json()
+    )
+
+    return json.loads(fig_json)
+
+
+def puntos_figura(fig):
+    """
+    Puntos dibujados (largo de x de cada traza) de una figura como dict.
+    Desde Plotly 6.1 los arreglos numéricos van como {"dtype", "bdata"}.
+    """
+    total = 0
+    for traza in fig["data"]:
+        x = traza.get("x", ())
+        if isinstance(x, dict):
+            total += len(base64.b64decode(x["bdata"])) // np.dtype(x["dtype"]).itemsize
+        else:
+            total += len(x)
+    return total
+
+
+# ------------------------------------------------------------
+# LÁMINAS EN PARALELO — figura e insights de cada grupo en el
+# pool de procesos de la ingesta (Plotly retiene el GIL)
+# ------------------------------------------------------------
+
+# Con menos figuras por construir no compensa repartirlas entre procesos
+LAMINAS_MIN_POOL = int(os.environ.get("MAQUINARIA_LAMINAS_MIN_POOL", "4"))
+
+
+def _lamina_proceso(tabla, df_base, df_diag, grupo, metas, periodo, semana_ref):
+    """
+    Tarea del pool: figura (JSON) e insights de un grupo, sobre sus tramos.
+    """
+    fig_json = grafico_diario(
+        tabla, df_base, grupo, metas["func"], metas["ralenti"], periodo, semana_ref
+    ).to_json()
+    return fig_json, insights_periodo(df_diag, grupo, periodo)
+
+
+def construir_laminas(actual, base, diag, grupos, periodo, semana_ref, registro=SIN_REGISTRO):
+    """
+    Entrega (grupo, figura, insights) en el orden de `grupos`, cada una
+    apenas está lista: quien la consume puede dibujarla sin esperar al
+    resto. Las figuras que no están en caché, si son varias, se construyen
+    en paralelo en el pool de procesos; si no, aquí mismo.
+    actual, base y diag vienen particionadas por grupo (PorGrupo).
+    """
+    from concurrent.futures.process import BrokenProcessPool
+    from ingesta import PROCESOS, descartar_pool, pool_procesos
+
+    # Sin metas no hay líneas de referencia ni lámina (ver con_metas)
+    grupos = [g for g in grupos if g in METAS]
+
+    cache = cache_figuras()
+    claves = {
+        g: clave_figura(actual, base, g, METAS[g]["func"], METAS[g]["ralenti"], periodo, semana_ref)
+        for g in grupos
+    }
+    faltantes = [g for g in grupos if cache.buscar(claves[g]) is None]
+
+    futuros = {}
+    if PROCESOS > 1 and len(faltantes) >= LAMINAS_MIN_POOL:
+        try:
+            pool = pool_procesos()
+            futuros = {
+                g: pool.submit(
+                    _lamina_proceso, actual[g], base[g], diag[g], g, METAS[g], periodo, semana_ref
+                )
+                for g in faltantes
+            }
+        except BrokenProcessPool:
+            descartar_pool()
+            futuros = {}
+
+    for grupo in grupos:
+        if grupo in futuros:
+            with registro.etapa(
+                "lamina", grupo, len(actual[grupo]), procesos=min(PROCESOS, len(futuros))
+            ) as e:
+                try:
+                    fig_json, insights = futuros[grupo].result()
+                except BrokenProcessPool:
+                    # un proceso murió: este grupo y los que falten se arman aquí
+                    descartar_pool()
+                    futuros.clear()
+                    fig_json = None
+                e["filas_salida"] = len(insights) if fig_json else None
+
+            if fig_json:
+                fig = json.loads(cache.obtener(claves[grupo], lambda: fig_json))
+                yield grupo, fig, insights
+                continue
+
+        metas = METAS[grupo]
+        with registro.etapa("figura", grupo, len(actual[grupo])) as e:
+            fig = figura_diario(
+                actual, base, grupo, metas["func"], metas["ralenti"], periodo, semana_ref
+            )
+            e["filas_salida"] = puntos_figura(fig)
+
+        with registro.etapa("insights", grupo, len(actual[grupo])) as e:
+            insights = insights_periodo(diag, grupo, periodo)
+            e["filas_salida"] = len(insights)
+
+        yield grupo, fig, insights
@@ -0,0 +1,915 @@
+# ============================================================
+#     INGESTA — ANALÍTICA MAQUINARIA / PROVIDENCIA IPSA
+# ============================================================
+# Lectura de exports, maestro, caché en disco e histórico/cubo SQLite.
+# Solo depende de pandas/NumPy (sin Streamlit ni Plotly).
+
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import ExitStack, closing, contextmanager
+
+import pandas as pd
+import numpy as np
+
+from medicion import SIN_REGISTRO
+
+# Copy-on-Write (siempre activo desde pandas 3): las vistas del caché
+# compartido se copian solo en la columna que alguien modifique.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+# ============================================================
+# 1. MAESTRO — ARCHIVO EXTERNO (CSV / PARQUET)
+# ============================================================
+
+MAESTRO_RUTA = os.environ.get(
+    "MAQUINARIA_MAESTRO",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "maestro_maquinaria.csv")
+)
+
+COLUMNAS_MAESTRO = [
+    "Máquina", "Modelo", "Tipo", "Número de serie de la máquina", "Grupo_trabajo"
+]
+
+
+class Maestro:
+    """
+    Maestro de máquinas con un índice categórico sobre 'Máquina':
+    el cruce con un archivo es una búsqueda de códigos, no un merge por strings.
+    """
+
+    def __init__(self, df, firma):
+        self.df = df.reset_index(drop=True)
+        self.firma = firma
+        self.categorias = pd.CategoricalDtype(self.df["Máquina"])
+        self.grupos = pd.Series(self.df["Grupo_trabajo"].to_numpy(), index=self.df["Máquina"])
+
+    def codigos(self, maquinas):
+        """
+        Posición de cada máquina en el maestro (-1 si no está).
+        """
+        return pd.Categorical(maquinas, dtype=self.categorias).codes
+
+    def unir(self, df):
+        """
+        Agrega las columnas del maestro a df (equivale a un left join).
+        """
+        codigos = self.codigos(df["Máquina"])
+        out = df.copy()
+        for col in COLUMNAS_MAESTRO[1:]:
+            out[col] = self.df[col].array.take(codigos, allow_fill=True)
+        return out
+
+    def sin_maestro(self, df):
+        """
+        Máquinas del archivo que no existen en el maestro.
+        """
+        codigos = self.codigos(df["Máquina"])
+        return sorted(df["Máquina"][codigos < 0].dropna().unique())
+
+
+def leer_maestro(contenido, ruta):
+    """
+    Lee el maestro desde los bytes del archivo (CSV o Parquet).
+    """
+    import io
+
+    if ruta.lower().endswith(".parquet"):
+        df = pd.read_parquet(io.BytesIO(contenido))
+    else:
+        df = pd.read_csv(io.BytesIO(contenido), dtype=str, encoding="utf-8-sig")
+
+    faltantes = [c for c in COLUMNAS_MAESTRO if c not in df.columns]
+    if faltantes:
+        raise ValueError(
+            f"El maestro {ruta} no tiene las columnas: " + ", ".join(faltantes)
+        )
+
+    # Celdas en blanco quedan NaN (astype(str) de pandas 2 las vuelve "nan")
+    df = df[COLUMNAS_MAESTRO]
+    df = df.astype(str).where(df.notna())
+    df["Máquina"] = df["Máquina"].str.strip()
+    df["Grupo_trabajo"] = df["Grupo_trabajo"].str.strip().replace("", np.nan)
+
+    return df.dropna(subset=["Máquina"]).drop_duplicates("Máquina", keep="first")
+
+
+# Estado del proceso: los módulos importados sobreviven a los reruns de
+# Streamlit y los ven todas las sesiones. Todo el estado compartido del
+# panel (maestro, caché en memoria, pool, figuras, vigilante, renderizador)
+# sigue la misma forma: un dict con su "lock" y los valores que protege.
+_ESTADO_MAESTRO = {"lock": threading.Lock()}
+
+
+def maestro():
+    """
+    Maestro vigente. Se vuelve a leer solo cuando cambia el archivo:
+    primero se mira fecha/tamaño y, si cambiaron, el hash del contenido.
+    """
+    estado = _ESTADO_MAESTRO
+    info = os.stat(MAESTRO_RUTA)
+    marca = (MAESTRO_RUTA, info.st_mtime_ns, info.st_size)
+
+    with estado["lock"]:
+        if estado.get("marca") != marca:
+            with open(MAESTRO_RUTA, "rb") as f:
+                contenido = f.read()
+            firma = hashlib.sha256(contenido).hexdigest()[:16]
+
+            if estado.get("firma") != firma:
+                estado["maestro"] = Maestro(leer_maestro(contenido, MAESTRO_RUTA), firma)
+                estado["firma"] = firma
+
+            estado["marca"] = marca
+
+        return estado["maestro"]
+
+
+# ============================================================
+# 2. CACHE DE ARCHIVOS
+# ============================================================
+
+# Columnas del export de Operation Center que realmente usa el panel
+COLUMNAS_PCT = [
+    "Utilización En funcionamiento (%)",
+    "Utilización Transporte (%)",
+    "Utilización Ralentí (%)",
+]
+
+COLUMNAS_HORAS = [
+    "Utilización En funcionamiento (h)",
+    "Utilización Transporte (h)",
+    "Utilización Ralentí (h)",
+    "Horas de trabajo del motor Período (h)",
+]
+
+COLUMNAS_REQUERIDAS = ["Máquina", "Fecha de inicio"] + COLUMNAS_PCT + COLUMNAS_HORAS
+
+# Operation Center exporta las fechas día/mes/año
+FORMATO_FECHA = "%d/%m/%Y"
+
+# Formatos que se prueban, en orden, si el export no viene día/mes/año
+# (depende de la configuración regional de la cuenta)
+FORMATOS_FECHA = [FORMATO_FECHA, "%Y-%m-%d", "%d-%m-%Y", "%m/%d/%Y"]
+
+# Columnas de período que acompañan a 'Fecha de inicio'. La semana va con
+# el año ISO ('2026-W42'), como en el cubo: el número solo se repite cada año.
+COLUMNAS_PERIODO = ["Año ISO", "Semana ISO", "Semana", "Mes"]
+
+
+def cargar_excel(file):
+    """
+    Lee el export de Operation Center en modo solo-lectura (streaming),
+    tomando únicamente las columnas requeridas y con tipos explícitos.
+    Devuelve (df, segundos de lectura).
+    """
+    import zipfile
+    from openpyxl import load_workbook
+
+    t0 = time.perf_counter()
+
+    file.seek(0)
+    try:
+        wb = load_workbook(file, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, OSError) as e:
+        raise ValueError("El archivo no es un Excel (.xlsx) válido.") from e
+    try:
+        filas = wb.active.iter_rows(values_only=True)
+        encabezado = [str(c).strip() if c is not None else "" for c in next(filas, ())]
+
+        faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in encabezado]
+        if faltantes:
+            raise ValueError(
+                "El archivo no tiene las columnas esperadas de Operation Center: "
+                + ", ".join(faltantes)
+            )
+
+        idx = [encabezado.index(c) for c in COLUMNAS_REQUERIDAS]
+        columnas = [[] for _ in idx]
+
+        for fila in filas:
+            if fila[idx[0]] is None:
+                continue
+            for col, i in zip(columnas, idx):
+                col.append(fila[i])
+    finally:
+        wb.close()
+
+    datos = dict(zip(COLUMNAS_REQUERIDAS, columnas))
+    df = pd.DataFrame({
+        "Máquina": pd.Series(datos["Máquina"], dtype="object").astype(str).str.strip(),
+    })
+    df = pd.concat([df, normalizar_fechas(pd.Series(datos["Fecha de inicio"], dtype="object"))], axis=1)
+
+    for c in COLUMNAS_PCT + COLUMNAS_HORAS:
+        df[c] = pd.to_numeric(pd.Series(datos[c], dtype="object"), errors="coerce").astype("float32")
+
+    return df, time.perf_counter() - t0
+
+
+def detectar_formato_fecha(textos):
+    """
+    Primer formato de FORMATOS_FECHA que entiende todos los textos o,
+    si hay celdas inválidas, el que entiende más.
+    """
+    mejor, aciertos = FORMATO_FECHA, -1
+    for formato in FORMATOS_FECHA:
+        n = pd.to_datetime(textos, format=formato, exact=False, errors="coerce").notna().sum()
+        if n == len(textos):
+            return formato
+        if n > aciertos:
+            mejor, aciertos = formato, n
+    return mejor
+
+
+def parsear_fecha(serie):
+    """
+    Convierte 'Fecha de inicio' a datetime. Un export trae pocas fechas
+    distintas: se convierte cada valor distinto una sola vez, con el
+    formato detectado una vez para toda la columna. Las celdas que Excel
+    ya entrega como fecha se respetan tal cual.
+    """
+    codigos, unicos = pd.factorize(serie)
+    unicos = pd.Series(unicos, dtype="object")
+    es_texto = unicos.map(lambda v: isinstance(v, str)).astype(bool)
+
+    fechas = pd.to_datetime(unicos.where(~es_texto), errors="coerce").astype("datetime64[ns]")
+    if es_texto.any():
+        textos = unicos[es_texto].str.strip()
+        fechas[es_texto] = pd.to_datetime(
+            textos,
+            format=detectar_formato_fecha(textos),
+            exact=False,
+            errors="coerce"
+        )
+
+    return pd.Series(fechas.array.take(codigos, allow_fill=True), index=serie.index)
+
+
+def columnas_periodo(fechas):
+    """
+    COLUMNAS_PERIODO de cada fecha, calculadas una vez por fecha distinta.
+    """
+    codigos, unicas = pd.factorize(fechas)
+    iso = pd.DatetimeIndex(unicas).isocalendar()
+
+    def repartir(valores):
+        return pd.array(valores).take(codigos, allow_fill=True)
+
+    return pd.DataFrame({
+        "Año ISO": repartir(iso["year"].to_numpy()).astype("UInt16"),
+        "Semana ISO": repartir(iso["week"].to_numpy()).astype("UInt8"),
+        "Semana": pd.Categorical(repartir(
+            (iso["year"].astype(str) + "-W" + iso["week"].astype(str).str.zfill(2)).to_numpy()
+        )),
+        "Mes": pd.Categorical(repartir(pd.DatetimeIndex(unicas).strftime("%Y-%m").to_numpy())),
+    }, index=fechas.index)
+
+
+def normalizar_fechas(serie):
+    """
+    Etapa única de fechas: 'Fecha de inicio' como datetime y sus
+    COLUMNAS_PERIODO. Diario, semanal, histórico y cubo reutilizan estas
+    columnas en lugar de volver a convertir.
+    """
+    fechas = parsear_fecha(serie).rename("Fecha de inicio")
+    return pd.concat([fechas, columnas_periodo(fechas)], axis=1)
+
+
+def fecha_referencia(df):
+    """
+    (último día, su semana ISO) de un dataset normalizado, o None si no
+    tiene fechas válidas.
+    """
+    fechas = df["Fecha de inicio"]
+    if fechas.isna().all():
+        return None
+
+    i = fechas.idxmax()
+    return fechas[i], int(df.at[i, "Semana ISO"])
+
+def unir_maestro(df):
+    return maestro().unir(df)
+
+# ------------------------------------------------------------
+# CACHÉ EN DISCO (PARQUET) — sobrevive reinicios del servidor
+# ------------------------------------------------------------
+
+CACHE_DIR = os.environ.get("MAQUINARIA_CACHE_DIR", ".cache_maquinaria")
+CACHE_MAX_MB = float(os.environ.get("MAQUINARIA_CACHE_MB", "512"))
+
+# Subir cuando cambie la forma o el contenido del DataFrame que se guarda
+VERSION_CACHE = "3"
+
+
+def firma_maestro():
+    """
+    Huella del maestro: si cambia, las entradas de caché dejan de ser válidas.
+    """
+    return maestro().firma
+
+
+def hash_archivo(file):
+    """
+    Hash SHA-256 del contenido subido (identifica el archivo entre sesiones).
+    """
+    return hashlib.sha256(file.getvalue()).hexdigest()
+
+
+def ruta_cache(clave):
+    return os.path.join(CACHE_DIR, f"{clave}-{firma_maestro()}-v{VERSION_CACHE}.parquet")
+
+
+def leer_cache(ruta, registro=SIN_REGISTRO, nombre=None):
+    """
+    DataFrame guardado en caché, o None si no está (o está dañado).
+    """
+    if not os.path.exists(ruta):
+        return None
+
+    try:
+        with registro.etapa("leer_cache", archivo=nombre) as e:
+            df = pd.read_parquet(ruta)
+            e["filas_salida"] = len(df)
+        os.utime(ruta)  # marca de uso para el LRU
+        return df
+    except Exception:
+        return None  # archivo corrupto o incompleto: se vuelve a parsear
+
+
+def guardar_cache(df, ruta, registro=SIN_REGISTRO, nombre=None):
+    try:
+        with registro.etapa("guardar_cache", filas_entrada=len(df), archivo=nombre):
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp = f"{ruta}.{os.getpid()}.tmp"
+            df.to_parquet(tmp, index=False)
+            os.replace(tmp, ruta)
+            podar_cache()
+    except OSError:
+        pass  # sin disco disponible el panel sigue funcionando
+
+
+# ------------------------------------------------------------
+# CACHÉ EN MEMORIA — compartido entre sesiones del proceso
+# ------------------------------------------------------------
+
+CACHE_MEMORIA_MB = float(os.environ.get("MAQUINARIA_CACHE_MEMORIA_MB", "256"))
+
+_MEMORIA = {"lock": threading.Lock(), "datos": OrderedDict(), "bytes": 0}
+
+# Un lock por archivo hace que, si varias sesiones suben el mismo export a
+# la vez, una lo cargue y las demás la esperen. Aparte del LRU de datos:
+# cada lock vive mientras alguien lo usa o lo espera (ruta -> [lock, usos]).
+_CANDADOS = {"lock": threading.Lock(), "archivos": {}}
+
+
+@contextmanager
+def candado_archivo(ruta):
+    """
+    Toma el lock del archivo; al soltarlo, si nadie más lo usa, se borra.
+    """
+    with _CANDADOS["lock"]:
+        entrada = _CANDADOS["archivos"].setdefault(ruta, [threading.Lock(), 0])
+        entrada[1] += 1
+
+    try:
+        with entrada[0]:
+            yield
+    finally:
+        with _CANDADOS["lock"]:
+            entrada[1] -= 1
+            if entrada[1] == 0:
+                del _CANDADOS["archivos"][ruta]
+
+
+def vista_compartida(ruta):
+    """
+    Vista del DataFrame compartido (sin copiar datos), o None si no está.
+    Con Copy-on-Write, modificar la vista no toca el original.
+    """
+    with _MEMORIA["lock"]:
+        item = _MEMORIA["datos"].get(ruta)
+        if item is None:
+            return None
+        _MEMORIA["datos"].move_to_end(ruta)
+        return item[0].copy(deep=False)
+
+
+def compartir(df, ruta):
+    """
+    Guarda df como entrada compartida (LRU hasta CACHE_MEMORIA_MB) y
+    devuelve una vista.
+    """
+    tam = int(df.memory_usage(deep=True).sum())
+    datos = _MEMORIA["datos"]
+
+    with _MEMORIA["lock"]:
+        if ruta not in datos:
+            datos[ruta] = (df, tam)
+            _MEMORIA["bytes"] += tam
+        datos.move_to_end(ruta)
+
+        # la entrada recién usada nunca se descarta
+        while _MEMORIA["bytes"] > CACHE_MEMORIA_MB * 1024 ** 2 and len(datos) > 1:
+            vieja, (_, t) = datos.popitem(last=False)
+            _MEMORIA["bytes"] -= t
+
+        return datos[ruta][0].copy(deep=False)
+
+
+def cargar_operation_center(file, registro=SIN_REGISTRO):
+    """
+    Carga un export de Operation Center ya unido al maestro.
+    La clave es el hash del contenido subido: el mismo archivo (diario
+    o semanal) se lee desde Parquet en disco en lugar de re-parsear el Excel.
+    Cada paso (caché, lectura, maestro) queda medido en `registro`.
+    Devuelve (df, segundos, desde_cache).
+    """
+    cargas, segundos = cargar_varios([file], registro)
+    _, df, desde_cache, _ = cargas[0]
+    return df, segundos, desde_cache
+
+
+def cargar_varios(files, registro=SIN_REGISTRO):
+    """
+    Carga varios exports ya unidos al maestro. Primero se busca el
+    contenido en memoria (compartida entre sesiones), luego en Parquet;
+    el resto se parsea en paralelo en el pool de procesos (si falta uno
+    solo, se parsea aquí sin pagar el arranque del pool). Los DataFrames
+    son vistas de solo-lectura de una única copia por contenido.
+    Devuelve ([(file, df, desde_cache, hash), ...], segundos) en el orden
+    recibido; el hash del contenido sirve de clave para registrar_historial.
+    """
+    t0 = time.perf_counter()
+
+    hashes = [hash_archivo(file) for file in files]
+    rutas = [ruta_cache(h) for h in hashes]
+    cargas = [None] * len(files)
+    pendientes = {}
+
+    with ExitStack() as candados:
+        # en orden fijo: dos sesiones con archivos en común no se bloquean
+        for ruta in sorted(set(rutas)):
+            candados.enter_context(candado_archivo(ruta))
+
+        for i, (file, ruta) in enumerate(zip(files, rutas)):
+            df = vista_compartida(ruta)
+            if df is None:
+                df = leer_cache(ruta, registro, getattr(file, "name", None))
+                df = None if df is None else compartir(df, ruta)
+            if df is None:
+                pendientes.setdefault(ruta, []).append(i)
+            else:
+                cargas[i] = (file, df, True, hashes[i])
+
+        a_parsear = [files[indices[0]] for indices in pendientes.values()]
+
+        for (ruta, indices), df in zip(pendientes.items(), parsear_exports(a_parsear, registro)):
+            nombre = getattr(files[indices[0]], "name", None)
+
+            with registro.etapa("unir_maestro", filas_entrada=len(df), archivo=nombre) as e:
+                df = unir_maestro(df)
+                e["filas_salida"] = int(df["Grupo_trabajo"].notna().sum())
+
+            guardar_cache(df, ruta, registro, nombre)
+            df = compartir(df, ruta)
+            for i in indices:
+                cargas[i] = (files[i], df, False, hashes[i])
+
+    return cargas, time.perf_counter() - t0
+
+
+def unir_exports(dfs):
+    """
+    Un solo dataset a partir de varios exports: se concatenan y, si una
+    (Máquina, Fecha de inicio) aparece en más de uno, gana el último
+    (la misma precedencia que registrar_historial).
+    """
+    if len(dfs) == 1:
+        return dfs[0]
+
+    df = pd.concat(dfs, ignore_index=True)
+    df = df.drop_duplicates(["Máquina", "Fecha de inicio"], keep="last", ignore_index=True)
+
+    # categorías distintas por archivo: concat las deja como texto
+    for col in ("Semana", "Mes"):
+        df[col] = df[col].astype("category")
+    return df
+
+
+# ------------------------------------------------------------
+# LECTURA EN PARALELO — openpyxl retiene el GIL, así que los
+# exports se parsean en procesos aparte
+# ------------------------------------------------------------
+
+PROCESOS = int(os.environ.get("MAQUINARIA_PROCESOS", "0")) or os.cpu_count() or 1
+
+_POOL = {"lock": threading.Lock(), "pool": None}
+
+
+def pool_procesos():
+    """
+    Pool de procesos persistente. Usa 'spawn': es seguro dentro del
+    servidor de Streamlit (que tiene hilos) y es el único modo en Windows.
+    Los procesos solo importan este módulo, así que arrancan rápido.
+    """
+    with _POOL["lock"]:
+        if _POOL["pool"] is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            _POOL["pool"] = ProcessPoolExecutor(
+                max_workers=PROCESOS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _POOL["pool"]
+
+
+def descartar_pool():
+    """
+    Olvida un pool roto (un proceso murió); el próximo uso crea otro.
+    """
+    with _POOL["lock"]:
+        _POOL["pool"] = None
+
+
+def _parsear_contenido(contenido):
+    """
+    Tarea del pool: bytes del .xlsx -> DataFrame (sin maestro).
+    """
+    import io
+
+    return cargar_excel(io.BytesIO(contenido))[0]
+
+
+def parsear_exports(files, registro=SIN_REGISTRO):
+    """
+    Parsea varios .xlsx; con más de uno, en paralelo en el pool de procesos.
+    Un error de columnas se informa con el nombre del archivo.
+    """
+    def con_nombre(file, err):
+        return ValueError(f"{getattr(file, 'name', 'archivo')}: {err}")
+
+    if len(files) <= 1:
+        resultado = []
+        for file in files:
+            with registro.etapa("parsear_excel", archivo=getattr(file, "name", None)) as e:
+                try:
+                    resultado.append(cargar_excel(file)[0])
+                except ValueError as err:
+                    raise con_nombre(file, err) from None
+                e["filas_salida"] = len(resultado[-1])
+        return resultado
+
+    from concurrent.futures.process import BrokenProcessPool
+
+    # El pico de memoria de esta etapa es el del proceso principal:
+    # lo que usan los procesos del pool no se mide
+    with registro.etapa(
+        "parsear_excel", filas_entrada=len(files), procesos=min(PROCESOS, len(files))
+    ) as e:
+        try:
+            futuros = [pool_procesos().submit(_parsear_contenido, f.getvalue()) for f in files]
+            resultado = []
+            for file, futuro in zip(files, futuros):
+                try:
+                    resultado.append(futuro.result())
+                except ValueError as err:
+                    raise con_nombre(file, err) from None
+        except BrokenProcessPool:
+            # un proceso murió (memoria, señal): se descarta el pool y se sigue aquí
+            descartar_pool()
+            resultado = [cargar_excel(f)[0] for f in files]
+
+        e["filas_salida"] = sum(map(len, resultado))
+
+    return resultado
+
+
+def podar_cache(max_mb=None):
+    """
+    Elimina las entradas menos usadas hasta quedar bajo el tope de tamaño.
+    """
+    max_bytes = (CACHE_MAX_MB if max_mb is None else max_mb) * 1024 * 1024
+
+    entradas = []
+    for nombre in os.listdir(CACHE_DIR):
+        if nombre.endswith(".parquet"):
+            ruta = os.path.join(CACHE_DIR, nombre)
+            st_ = os.stat(ruta)
+            entradas.append((st_.st_mtime, st_.st_size, ruta))
+
+    total = sum(e[1] for e in entradas)
+    for _, tam, ruta in sorted(entradas):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(ruta)
+            total -= tam
+        except OSError:
+            pass
+
+# ------------------------------------------------------------
+# HISTÓRICO LOCAL (SQLite) — líneas base sin re-subir archivos
+# ------------------------------------------------------------
+
+HISTORIAL_DB = os.environ.get("MAQUINARIA_HISTORIAL", "historial_maquinaria.sqlite")
+
+# Columna del export -> columna en el histórico
+COLUMNAS_HISTORIAL = {
+    "Máquina": "maquina",
+    "Fecha de inicio": "fecha",
+    "Utilización En funcionamiento (%)": "func_pct",
+    "Utilización Transporte (%)": "trans_pct",
+    "Utilización Ralentí (%)": "ral_pct",
+    "Utilización En funcionamiento (h)": "func_h",
+    "Utilización Transporte (h)": "trans_h",
+    "Utilización Ralentí (h)": "ral_h",
+    "Horas de trabajo del motor Período (h)": "motor_h",
+}
+
+# Subir cuando cambie la forma del cubo o sus grupos: se reconstruye desde utilizacion
+VERSION_HISTORIAL = 3
+
+# Tipo del cubo -> (columna de porcentaje, columna de horas) en el histórico
+TIPOS_CUBO = {
+    "Funcionamiento": ("func_pct", "func_h"),
+    "Transporte": ("trans_pct", "trans_h"),
+    "Ralenti": ("ral_pct", "ral_h"),
+    "Horas_Motor": (None, "motor_h"),
+}
+
+GRANOS = ["dia", "semana", "mes"]
+
+
+def conectar_historial(ruta=None):
+    """
+    Abre (y crea si no existe) el histórico de utilización.
+    Una fila por (máquina, fecha); las consultas por rango usan el índice de fecha.
+    """
+    con = sqlite3.connect(ruta or HISTORIAL_DB, timeout=30)
+    con.executescript("""
+        CREATE TABLE IF NOT EXISTS utilizacion (
+            maquina   TEXT NOT NULL,
+            fecha     TEXT NOT NULL,
+            func_pct  REAL,
+            trans_pct REAL,
+            ral_pct   REAL,
+            func_h    REAL,
+            trans_h   REAL,
+            ral_h     REAL,
+            motor_h   REAL,
+            PRIMARY KEY (maquina, fecha)
+        ) WITHOUT ROWID;
+
+        CREATE INDEX IF NOT EXISTS ix_utilizacion_fecha ON utilizacion (fecha);
+
+        CREATE TABLE IF NOT EXISTS archivos (
+            hash    TEXT PRIMARY KEY,
+            cargado TEXT NOT NULL,
+            filas   INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS cubo (
+            grano     TEXT NOT NULL,
+            periodo   TEXT NOT NULL,
+            maquina   TEXT NOT NULL,
+            grupo     TEXT NOT NULL,
+            tipo      TEXT NOT NULL,
+            suma_pct  REAL NOT NULL,
+            n_pct     INTEGER NOT NULL,
+            suma_h    REAL NOT NULL,
+            n_h       INTEGER NOT NULL,
+            PRIMARY KEY (grano, periodo, grupo, maquina, tipo)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS meta (
+            clave TEXT PRIMARY KEY,
+            valor TEXT NOT NULL
+        );
+    """)
+
+    firma = con.execute("SELECT valor FROM meta WHERE clave = 'maestro'").fetchone()
+    if (
+        con.execute("PRAGMA user_version").fetchone()[0] < VERSION_HISTORIAL
+        or firma is None
+        or firma[0] != firma_maestro()
+    ):
+        reconstruir_cubo(con)
+
+    return con
+
+
+def reconstruir_cubo(con):
+    """
+    Recalcula el cubo completo desde utilizacion. Solo ocurre al cambiar
+    la versión del esquema o el maestro (el grupo de cada máquina).
+    """
+    with con:
+        con.execute("BEGIN IMMEDIATE")
+        con.execute("DROP TABLE IF EXISTS agregados")  # esquema anterior
+        con.execute("DELETE FROM cubo")
+        actualizar_cubo(con, pd.read_sql_query("SELECT * FROM utilizacion", con))
+        con.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('maestro', ?)",
+            (firma_maestro(),)
+        )
+        con.execute(f"PRAGMA user_version = {VERSION_HISTORIAL}")
+
+
+def registrar_historial(df, clave):
+    """
+    Agrega al histórico las filas de un archivo ya cargado.
+    Cada archivo (por hash) se procesa una sola vez. Si una (Máquina, Fecha)
+    ya estaba con otros valores gana el último archivo registrado (un
+    re-export corregido reemplaza al original): la fila vieja se descuenta
+    del cubo y la nueva se suma. Devuelve cuántas filas eran nuevas o
+    cambiaron.
+    """
+    filas = df[list(COLUMNAS_HISTORIAL)].dropna(subset=["Máquina", "Fecha de inicio"])
+    filas = filas.rename(columns=COLUMNAS_HISTORIAL)
+    filas["fecha"] = filas["fecha"].dt.strftime("%Y-%m-%d")
+    filas = filas.drop_duplicates(["maquina", "fecha"], keep="last")
+
+    with closing(conectar_historial()) as con, con:
+        con.execute("BEGIN IMMEDIATE")
+
+        if con.execute("SELECT 1 FROM archivos WHERE hash = ?", (clave,)).fetchone():
+            return 0
+
+        reemplazadas = filas.iloc[:0]
+        if not filas.empty:
+            existentes = pd.read_sql_query(
+                "SELECT * FROM utilizacion WHERE fecha BETWEEN ? AND ?",
+                con,
+                params=(filas["fecha"].min(), filas["fecha"].max())
+            )
+            claves = ["maquina", "fecha"]
+            valores = [c for c in filas.columns if c not in claves]
+            cruce = filas.merge(
+                existentes, on=claves, how="left", suffixes=("", "_previo"), indicator=True
+            )
+            existia = (cruce["_merge"] == "both").to_numpy()
+
+            # Misma fila con los mismos valores (NaN con NaN): nada que cambiar
+            nuevos = cruce[valores].to_numpy(dtype=float)
+            previos = cruce[[f"{c}_previo" for c in valores]].to_numpy(dtype=float)
+            iguales = existia & ((nuevos == previos) | (np.isnan(nuevos) & np.isnan(previos))).all(axis=1)
+
+            reemplazadas = existentes.merge(filas.loc[existia & ~iguales, claves], on=claves)
+            filas = filas.loc[~iguales]
+
+        actualizar_cubo(con, reemplazadas, signo=-1)
+        con.executemany(
+            f"INSERT OR REPLACE INTO utilizacion VALUES ({', '.join('?' * filas.shape[1])})",
+            filas.astype(object).where(filas.notna(), None).itertuples(index=False, name=None)
+        )
+        actualizar_cubo(con, filas)
+
+        con.execute(
+            "INSERT INTO archivos VALUES (?, datetime('now'), ?)",
+            (clave, len(filas))
+        )
+
+    return len(filas)
+
+
+def periodo_de(fecha, grano):
+    """
+    Clave del período de una fecha: '2026-10-14', '2026-W42' o '2026-10'.
+    La semana lleva el año ISO para no mezclar semanas de años distintos.
+    """
+    if grano == "dia":
+        return fecha.strftime("%Y-%m-%d")
+    if grano == "semana":
+        anio, semana, _ = fecha.isocalendar()
+        return f"{anio}-W{semana:02d}"
+    return fecha.strftime("%Y-%m")
+
+
+def actualizar_cubo(con, filas, signo=1):
+    """
+    Suma filas nuevas del histórico al cubo de utilización:
+    sumas de porcentaje y de horas, con sus conteos, por día, semana ISO
+    y mes, para cada máquina, grupo y Tipo. Las celdas son mergeables:
+    combinar períodos o archivos es sumar sumas y conteos, y con signo=-1
+    se descuentan filas reemplazadas.
+    """
+    if filas.empty:
+        return
+
+    claves = columnas_periodo(pd.to_datetime(filas["fecha"], format="%Y-%m-%d"))
+    periodos = {
+        "dia": filas["fecha"].to_numpy(),
+        "semana": claves["Semana"].astype(str).to_numpy(),
+        "mes": claves["Mes"].astype(str).to_numpy(),
+    }
+
+    grupo = (
+        filas["maquina"]
+        .map(maestro().grupos)
+        .fillna("")
+        .to_numpy()
+    )
+
+    partes = []
+    for tipo, (col_pct, col_h) in TIPOS_CUBO.items():
+        pct = filas[col_pct].astype(float) * 100 if col_pct else np.nan
+        partes.append(pd.DataFrame({
+            **periodos,
+            "maquina": filas["maquina"].to_numpy(),
+            "grupo": grupo,
+            "tipo": tipo,
+            "pct": pct,
+            "h": filas[col_h].astype(float).to_numpy(),
+        }))
+    largo = pd.concat(partes, ignore_index=True)
+
+    for grano in GRANOS:
+        acum = (
+            largo
+            .groupby([grano, "maquina", "grupo", "tipo"])
+            .agg(
+                suma_pct=("pct", "sum"),
+                n_pct=("pct", "count"),
+                suma_h=("h", "sum"),
+                n_h=("h", "count"),
+            )
+            .mul(signo)
+            .reset_index()
+        )
+
+        con.executemany(
+            """
+            INSERT INTO cubo VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (grano, periodo, grupo, maquina, tipo) DO UPDATE SET
+                suma_pct = suma_pct + excluded.suma_pct,
+                n_pct    = n_pct + excluded.n_pct,
+                suma_h   = suma_h + excluded.suma_h,
+                n_h      = n_h + excluded.n_h
+            """,
+            (
+                (grano, per, maq, grp, tipo, float(sp), int(np_), float(sh), int(nh))
+                for per, maq, grp, tipo, sp, np_, sh, nh in acum.itertuples(index=False, name=None)
+            )
+        )
+
+
+def leer_cubo(grano, desde, hasta=None):
+    """
+    Celdas del cubo (sumas y conteos) de un grano entre dos períodos
+    (inclusive). Lectura indexada: el costo depende de grupos × máquinas,
+    no de las filas del histórico.
+    """
+    with closing(conectar_historial()) as con:
+        df = pd.read_sql_query(
+            "SELECT periodo, maquina, grupo, tipo, suma_pct, n_pct, suma_h, n_h "
+            "FROM cubo WHERE grano = ? AND periodo BETWEEN ? AND ?",
+            con,
+            params=(grano, desde, hasta or desde)
+        )
+
+    df.columns = [
+        "Periodo", "Máquina", "Grupo_trabajo", "Tipo",
+        "suma_pct", "n_pct", "suma_h", "n_h"
+    ]
+    df["Grupo_trabajo"] = df["Grupo_trabajo"].replace("", np.nan)
+
+    return df
+
+
+def leer_historial(desde, hasta):
+    """
+    Filas del histórico entre dos fechas (inclusive), con las columnas
+    del export de Operation Center y unidas al maestro.
+    """
+    with closing(conectar_historial()) as con:
+        df = pd.read_sql_query(
+            f"SELECT {', '.join(COLUMNAS_HISTORIAL.values())} FROM utilizacion "
+            "WHERE fecha BETWEEN ? AND ?",
+            con,
+            params=(desde.strftime("%Y-%m-%d"), hasta.strftime("%Y-%m-%d"))
+        )
+
+    df = df.rename(columns={v: k for k, v in COLUMNAS_HISTORIAL.items()})
+    df["Máquina"] = df["Máquina"].astype(str)
+    df[["Fecha de inicio", *COLUMNAS_PERIODO]] = normalizar_fechas(df["Fecha de inicio"])
+    for c in COLUMNAS_PCT + COLUMNAS_HORAS:
+        df[c] = df[c].astype("float32")
+
+    return unir_maestro(df)
+
+
+def ultima_fecha_historial():
+    """
+    Último día con datos en el histórico (None si está vacío).
+    """
+    with closing(conectar_historial()) as con:
+        (fecha,) = con.execute("SELECT max(fecha) FROM utilizacion").fetchone()
+
+    return pd.Timestamp(fecha) if fecha else None
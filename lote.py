@@ -0,0 +1,215 @@
+# ============================================================
+#     MODO LOTE — ANALÍTICA MAQUINARIA / PROVIDENCIA IPSA
+# ============================================================
+
+import os
+import sys
+import json
+
+from ingesta import cargar_varios, fecha_referencia, registrar_historial
+from medicion import Registro
+from procesamiento import (
+    PERIODOS,
+    PONDERACION,
+    PONDERACIONES,
+    analizar_periodo,
+    con_metas,
+    insights_periodo,
+    particionar,
+)
+
+
+# ============================================================
+# 1. MODO LOTE — SIN NAVEGADOR (cron / línea de comandos)
+# ============================================================
+#
+#   python lote.py --diario diario.xlsx --semanal semanal.xlsx --salida reportes
+#   python lote.py --carpeta exports/ --formato pdf
+#
+# Alimenta el mismo caché Parquet y el mismo histórico SQLite que usa el
+# panel, así que al abrirlo en la mañana los archivos ya están procesados.
+# Gráficos y exportación se cargan solo si se piden láminas.
+
+FORMATOS_LOTE = ["zip", "pdf", "ninguno"]
+
+
+def abrir_archivo(ruta):
+    """
+    Archivo en disco con la misma interfaz que el archivo subido al panel.
+    """
+    import io
+
+    with open(ruta, "rb") as f:
+        archivo = io.BytesIO(f.read())
+    archivo.name = os.path.basename(ruta)
+    return archivo
+
+
+def archivos_carpeta(carpeta):
+    """
+    Exports .xlsx de una carpeta, en orden de nombre
+    (se ignoran los temporales ~$ que deja Excel abierto).
+    """
+    return sorted(
+        os.path.join(carpeta, n)
+        for n in os.listdir(carpeta)
+        if n.lower().endswith(".xlsx") and not n.startswith("~$")
+    )
+
+
+def nombre_archivo(texto):
+    return texto.replace(" ", "_").replace("/", "_").lower()
+
+
+def procesar_lote(archivos, salida, periodos=tuple(PERIODOS), formato="zip", registro=None,
+                  ponderacion=None):
+    """
+    Pipeline completo sin Streamlit para todos los grupos:
+    ingesta al histórico, tablas del cubo, diagnóstico, insights y láminas.
+    La fecha de referencia es el último día presente en los archivos.
+    Escribe una carpeta por período con actual.csv, base.csv,
+    diagnostico.csv, insights.json y reportes_maquinaria.<formato>.
+    Las etapas quedan en el registro JSON lines (origen "lote").
+    Devuelve {periodo: carpeta}.
+    """
+    registro = registro or Registro("lote")
+    try:
+        return _procesar_lote(archivos, salida, periodos, formato, registro, ponderacion)
+    finally:
+        registro.escribir()
+
+
+def _procesar_lote(archivos, salida, periodos, formato, registro, ponderacion):
+    referencia = None
+    grupos = set()
+
+    # Todos los exports a la vez: los que no están en caché se parsean en paralelo
+    cargas, t = cargar_varios([abrir_archivo(ruta) for ruta in archivos], registro)
+    print(f"{len(cargas)} archivo(s) leídos en {t:.2f} s")
+
+    for archivo, df, desde_cache, clave in cargas:
+        with registro.etapa("registrar_historial", filas_entrada=len(df), archivo=archivo.name) as e:
+            nuevas = e["filas_salida"] = registrar_historial(df, clave)
+
+        print(
+            f"{archivo.name}: {len(df)} filas{' (caché)' if desde_cache else ''}, "
+            f"{nuevas} nuevas o corregidas en el histórico"
+        )
+
+        ref = fecha_referencia(df)
+        if ref is not None and (referencia is None or ref > referencia):
+            referencia = ref
+        grupos.update(df["Grupo_trabajo"].dropna().unique())
+
+    if referencia is None:
+        raise ValueError("Los archivos no tienen fechas de inicio válidas.")
+
+    fecha_actual, semana_actual = referencia
+    grupos, sin_metas = con_metas(sorted(grupos))
+    if sin_metas:
+        print(f"aviso: grupo(s) sin metas, sin láminas ni insights: {', '.join(sin_metas)}", file=sys.stderr)
+    carpetas = {}
+
+    for periodo in periodos:
+        with registro.etapa("analizar_periodo", periodo=periodo) as e:
+            df_actual, df_base, df_diag = analizar_periodo(fecha_actual, periodo, ponderacion)
+            # un índice por tabla: cada grupo toma su tramo sin recorrer la flota
+            por_grupo, base, diag = particionar(df_actual), particionar(df_base), particionar(df_diag)
+            e["filas_salida"] = len(df_actual)
+
+        carpeta = os.path.join(salida, nombre_archivo(periodo))
+        os.makedirs(carpeta, exist_ok=True)
+
+        df_actual.to_csv(os.path.join(carpeta, "actual.csv"), index=False)
+        df_base.to_csv(os.path.join(carpeta, "base.csv"), index=False)
+        df_diag.to_csv(os.path.join(carpeta, "diagnostico.csv"), index=False)
+
+        reportes = []
+        textos = {}
+        presentes = [g for g in grupos if g in por_grupo]
+
+        if formato != "ninguno":
+            from graficos import construir_laminas
+
+            # figuras e insights de todos los grupos en el pool de procesos
+            for grupo, fig, insights in construir_laminas(
+                por_grupo, base, diag, presentes, periodo, semana_actual, registro
+            ):
+                textos[grupo] = insights
+                reportes.append((grupo, fig, insights))
+        else:
+            for grupo in presentes:
+                with registro.etapa("insights", grupo, len(por_grupo[grupo]), periodo=periodo) as e:
+                    textos[grupo] = insights_periodo(diag, grupo, periodo)
+                    e["filas_salida"] = len(textos[grupo])
+
+        with open(os.path.join(carpeta, "insights.json"), "w", encoding="utf-8") as f:
+            json.dump(textos, f, ensure_ascii=False, indent=2)
+
+        if reportes:
+            from exportar import exportar_lote
+
+            with registro.etapa("exportar", filas_entrada=len(reportes), periodo=periodo) as e:
+                archivo = exportar_lote(reportes, formato)
+                e["bytes"] = len(archivo)
+
+            with open(os.path.join(carpeta, f"reportes_maquinaria.{formato}"), "wb") as f:
+                f.write(archivo)
+
+        print(f"{periodo}: {len(textos)} grupos -> {carpeta}")
+        carpetas[periodo] = carpeta
+
+    return carpetas
+
+
+def cli(argv=None):
+    """
+    Punto de entrada de línea de comandos. Devuelve el código de salida.
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="maquinaria",
+        description="Genera agregados, insights y láminas de todos los grupos sin abrir el panel."
+    )
+    parser.add_argument("--diario", help="export diario de Operation Center (.xlsx)")
+    parser.add_argument("--semanal", help="export semanal de Operation Center (.xlsx)")
+    parser.add_argument("--carpeta", help="carpeta con exports .xlsx (alternativa a --diario)")
+    parser.add_argument("--salida", default="reportes_maquinaria", help="carpeta de resultados")
+    parser.add_argument(
+        "--periodo", choices=list(PERIODOS), action="append",
+        help="período a generar (por defecto todos; se puede repetir)"
+    )
+    parser.add_argument("--formato", choices=FORMATOS_LOTE, default="zip", help="formato de las láminas")
+    parser.add_argument(
+        "--ponderacion", choices=list(PONDERACIONES), default=PONDERACION,
+        help="filas: promedio de porcentajes; horas: horas del Tipo / horas de motor"
+    )
+    args = parser.parse_args(argv)
+
+    if args.carpeta:
+        archivos = archivos_carpeta(args.carpeta)
+    elif args.diario:
+        # Semanal primero: ante la misma (Máquina, Fecha) gana el diario,
+        # el último registrado (igual que en el panel)
+        archivos = [a for a in (args.semanal, args.diario) if a]
+    else:
+        parser.error("indique --diario o --carpeta")
+
+    if not archivos:
+        parser.error(f"no hay archivos .xlsx en {args.carpeta}")
+
+    try:
+        procesar_lote(
+            archivos, args.salida, args.periodo or tuple(PERIODOS), args.formato,
+            ponderacion=args.ponderacion
+        )
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
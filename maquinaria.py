@@ -1,32 +1,37 @@
 # ============================================================
 #     STREAMLIT — ANALÍTICA MAQUINARIA / PROVIDENCIA IPSA
 # ============================================================
+#
+#   streamlit run maquinaria.py     panel interactivo
+#   python lote.py --help            reportes sin navegador (cron)
+#   MAQUINARIA_CARPETA=/ruta/exports streamlit run maquinaria.py
+#                                    ingiere la carpeta en segundo plano
 
-import streamlit as st
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-import base64
-import os
-
+import sys
 
-st.set_page_config(
-    page_title="Panel de Maquinaria — Providencia",
-    layout="wide",
-    page_icon="🚜"
+import streamlit as st
+import streamlit.components.v1 as components
+
+from ingesta import cargar_varios, fecha_referencia, maestro, registrar_historial, unir_exports
+from procesamiento import (
+    PERIODOS,
+    PONDERACION,
+    PONDERACIONES,
+    analizar_periodo,
+    con_metas,
+    particionar,
+    reporte_memoria,
 )
+from graficos import construir_laminas
+from medicion import REGISTRO_RUTA, Registro
+from vigilante import iniciar_vigilante, leer_instantanea, meta_instantanea
+
 
 # ============================================================
-# 1. ESTILOS Y COLORES CORPORATIVOS
+# 1. ESTILOS
 # ============================================================
 
-PRIMARY = "#1A7335"      # Verde caña
-SECONDARY = "#F2C14E"    # Amarillo caña
-ACCENT = "#3E92CC"       # Azul corporativo
-GRAY = "#555555"
-BG = "#FAFAFA"
-
-st.markdown("""
+ESTILOS = """
 <style>
 /* Fondo general */
 body {
@@ -84,1121 +89,456 @@ hr {
     margin: 1.5rem 0;
 }
 </style>
-""", unsafe_allow_html=True)
-
-
-# ============================================================
-# 2. MAESTRO — FIJO EN EL SCRIPT
-# ============================================================
-
-MAESTRO_DATA = [
-    ["939434-N", "6170J", "Tractor", "1BM6170JLRD650768", "Fertilización"],
-    ["939435-N", "6170J", "Tractor", "1BM6170JPRD650762", "Fertilización"],
-    ["939436-S", "6170J", "Tractor", "1BM6170JJRD650764", "Fertilización"],
-    ["939437-S", "6170J", "Tractor", "1BM6170JCRD650765", "Fertilización"],
-    ["939438-CN", "6170J", "Tractor", "1BM6170JARD650767", "Fertilización"],
-    ["939439-O", "6170J", "Tractor", "1BM6170JHRD650769", "Fertilización"],
-
-    ["939692-P", "7M 230", "Tractor", "1BM7230CHRH000277", "Preparación"],
-    ["938556-P", "8320R", "Tractor", "1BM8320RHPS100735", "Preparación"],
-    ["938557-P", "8320R", "Tractor", "1BM8320REPS100736", "Preparación"],
-    ["939471-P", "8320R", "Tractor", "1BM8320RJRS100858", "Preparación"],
-    ["939472-P", "8320R", "Tractor", "1BM8320RKRS100857", "Preparación"],
-    ["939473-P", "8320R", "Tractor", "1BM8320RCRS100859", "Preparación"],
-
-    ["T939131-SI", "6170J", "Tractor", "1BM6170JHPD650493", "Siembra"],
-    ["T939132-SI", "6170J", "Tractor", "1BM6170JVPD650490", "Siembra"],
-    ["938555-SI",  "7230J", "Tractor", "1BM7230JCPH009888", "Siembra"],
-
-    ["T937293-CV", "6170J", "Tractor", "1BM6170JHND600108", "Vinaza"],
-    ["T939134-CV", "6170J", "Tractor", "1BM6170JAPD650491", "Vinaza"]
-]
-
-MAESTRO = pd.DataFrame(MAESTRO_DATA, columns=[
-    "Máquina", "Modelo", "Tipo", "Número de serie de la máquina", "Grupo_trabajo"
-])
-
-# ============================================================
-# 3. METAS POR GRUPO
-# ============================================================
-
-METAS = {
-    "Fertilización": {"func": 77, "ralenti": 13, "escala": 12},
-    "Preparación":   {"func": 82, "ralenti": 12, "escala": 4.5},
-    "Siembra":       {"func": 72, "ralenti": 15, "escala": 17},
-    "Vinaza":        {"func": 73, "ralenti": 20, "escala": 10},
-}
+"""
 
-# ============================================================
-# 4. CACHE DE ARCHIVOS
-# ============================================================
 
-@st.cache_data
-def cargar_excel(file):
-    return pd.read_excel(file)
+def configurar_pagina():
+    """
+    Configuración de la página y estilos (solo en el panel).
+    """
+    st.set_page_config(
+        page_title="Panel de Maquinaria — Providencia",
+        layout="wide",
+        page_icon="🚜"
+    )
+    st.markdown(ESTILOS, unsafe_allow_html=True)
 
-@st.cache_data
-def unir_maestro(df):
-    return df.merge(MAESTRO, on="Máquina", how="left")
 
 # ============================================================
-# 5. PROCESAMIENTO DIARIO
+# 2. UI — STREAMLIT
 # ============================================================
 
-def preparar_diario(df, escala):
-
-   
-    df["Fecha"] = pd.to_datetime(
-        df["Fecha de inicio"],
-        dayfirst=True,
-        errors="coerce"
-    )
+def main():
+    """
+    Panel interactivo (streamlit run maquinaria.py).
+    """
+    configurar_pagina()
+    vigilante = iniciar_vigilante()
 
-    fecha_actual = df["Fecha"].max()
-    semana_actual = int(fecha_actual.isocalendar().week)
+    st.sidebar.title("🚜 Panel de Maquinaria")
 
+    st.title("📊 Seguimiento diario de la maquinaria — Ingenio Providencia")
 
-    # ===============================
-    # 2. PORCENTAJES
-    # ===============================
-    df_pct = df[[
-        "Máquina", "Grupo_trabajo",
-        "Utilización En funcionamiento (%)",
-        "Utilización Transporte (%)",
-        "Utilización Ralentí (%)"
-    ]].copy()
+    #st.markdown("<hr>", unsafe_allow_html=True)
 
-    df_pct.columns = [
-        "Máquina", "Grupo_trabajo",
-        "Funcionamiento", "Transporte", "Ralenti"
-    ]
+    # ------------------------------------------------------------
+    # REPORTE DIARIO
+    # ------------------------------------------------------------
+    st.sidebar.header("📊 Período de análisis")
 
-    df_pct = df_pct.melt(
-        id_vars=["Máquina", "Grupo_trabajo"],
-        var_name="Tipo",
-        value_name="Porcentaje"
+    periodo = st.sidebar.radio(
+        "Comparación de desempeño",
+        options=list(PERIODOS),
+        index=0
     )
 
-    df_pct["Porcentaje"] *= 100
-
-    # ===============================
-    # 3. HORAS
-    # ===============================
-    df_h = df[[
-        "Máquina", "Grupo_trabajo",
-        "Utilización En funcionamiento (h)",
-        "Utilización Transporte (h)",
-        "Utilización Ralentí (h)",
-        "Horas de trabajo del motor Período (h)"
-    ]].copy()
-
-    df_h.columns = [
-        "Máquina", "Grupo_trabajo",
-        "Funcionamiento", "Transporte", "Ralenti", "Horas_Motor"
-    ]
-
-    df_horas = df_h.melt(
-        id_vars=["Máquina", "Grupo_trabajo"],
-        var_name="TipoHora",
-        value_name="Horas"
+    ponderacion = st.sidebar.radio(
+        "Porcentajes",
+        options=list(PONDERACIONES),
+        index=list(PONDERACIONES).index(PONDERACION),
+        format_func=PONDERACIONES.get,
+        help="Ponderado por horas: horas del Tipo / horas de motor; un turno corto pesa menos."
     )
 
-    df_horas["HorasEscaladas"] = df_horas["Horas"] * escala
-
-    # ===============================
-    # 4. METADATA DE FECHA (CLAVE)
-    # ===============================
-    fecha_actual = df["Fecha"].max()
-    semana_actual = int(fecha_actual.isocalendar().week)
+    #st.subheader("Seguimiento diario de la maquinaria")
 
-    return df_pct, df_horas, fecha_actual, semana_actual
-
-
-
-def preparar_promedio_semanal(df_long, grupo):
-    """
-    Promedio semanal por Máquina y Tipo
-    """
-    df_g = df_long[df_long["Grupo_trabajo"] == grupo]
+    st.sidebar.header("📂 Cargue de Información")
 
-    prom = (
-        df_g
-        .groupby(["Máquina", "Tipo"])
-        .agg(prom_semana=("Porcentaje", "mean"))
-        .reset_index()
+    archivos_diarios = st.sidebar.file_uploader(
+        "📅 Archivos diarios (Operation Center)",
+        type=["xlsx"],
+        accept_multiple_files=True,
+        key="diario"
     )
 
-    return prom
-
-def preparar_promedio_mensual(df_long):
-    df_long["Mes"] = df_long["Fecha"].dt.to_period("M")
-
-    prom = (
-        df_long
-        .groupby(["Máquina", "Tipo", "Mes"])
-        .agg(prom_mes=("Porcentaje", "mean"))
-        .reset_index()
+    archivos_semanales = st.sidebar.file_uploader(
+        "📆 Archivos semanales (opcional: completan el histórico)",
+        type=["xlsx"],
+        accept_multiple_files=True,
+        key="semanal"
     )
 
-    return prom
-
-import plotly.graph_objects as go
-
-def grafico_diario(df_pct, df_horas, df_long_semanal, grupo, meta_func, meta_ralenti, periodo, semana_ref):
-
-    # ===== COLORES =====
-    COLOR_FUNC = "#32CD32"
-    COLOR_TRANS = "#A6A6A6"
-    COLOR_RALENTI = "#FF8C00"
-    COLOR_META_F = "#006400"
-    COLOR_META_R = "#CC5500"
-
-    COLOR_PFUNC = "#037403"
-    COLOR_PRAL = "#613703"
-    COLOR_PTRAS = "#777777"
-
-    COLOR_FUNC_WEEK = "rgba(50,205,50,0.35)"
-    COLOR_RAL_WEEK  = "rgba(255,140,0,0.35)"
-    COLOR_TRANS_WEEK= "rgba(166,166,166,0.35)"
-
-    # ===== FILTRAR GRUPO =====
-    dfp = df_pct[df_pct["Grupo_trabajo"] == grupo].copy()
-    dfh = df_horas[df_horas["Grupo_trabajo"] == grupo].copy()
-
-    # ===== EJE X NUMÉRICO =====
-    maquinas = list(dfp["Máquina"].unique())
-    x_index = {m: i for i, m in enumerate(maquinas)}
-
-    OFFSET = {
-        "Funcionamiento": -0.25,
-        "Ralenti": 0.0,
-        "Transporte": 0.25
-    }
-
-    COLORS_BAR = {
-        "Funcionamiento": COLOR_FUNC,
-        "Ralenti": COLOR_RALENTI,
-        "Transporte": COLOR_TRANS
-    }
-
-    COLORS_PT = {
-        "Funcionamiento": COLOR_PFUNC,
-        "Ralenti": COLOR_PRAL,
-        "Transporte": COLOR_PTRAS
-    }
-
-    fig = go.Figure()
-
-    # ======================================================
-    # 0. BARRAS PROMEDIO SEMANAL (FONDO)
-    # ======================================================
-    df_week = preparar_promedio_semanal(df_long_semanal, grupo)
-
-    for tipo in ["Funcionamiento", "Ralenti", "Transporte"]:
-        d = df_week[df_week["Tipo"] == tipo].copy()
-        d["x_num"] = d["Máquina"].map(x_index) + OFFSET[tipo]
-
-        fig.add_trace(go.Bar(
-            x=d["x_num"],
-            y=d["prom_semana"],
-            marker_color=COLORS_BAR[tipo],
-            opacity=0.50,
-            width=0.38,
-            showlegend=False
-        ))
-
-        fig.add_trace(go.Scatter(
-            x=d["x_num"] + 0.06,
-            y=d["prom_semana"],
-            mode="text",
-            text=d["prom_semana"].round(0),
-            textfont=dict(color="#444444", size=8),
-            showlegend=False,
-            hoverinfo="skip"
-        ))
-
-    # ======================================================
-    # 1. BARRAS DIARIAS (%)
-    # ======================================================
-    for tipo in ["Funcionamiento", "Ralenti", "Transporte"]:
-        d = dfp[dfp["Tipo"] == tipo].copy()
-        d["x_num"] = d["Máquina"].map(x_index) + OFFSET[tipo]
-
-        fig.add_trace(go.Bar(
-            x=d["x_num"],
-            y=d["Porcentaje"],
-            marker_color=COLORS_BAR[tipo],
-            text=d["Porcentaje"].round(0),
-            textposition="outside",
-            textfont=dict(color="black"),
-            width=0.22,
-            name=tipo
-        ))
-
-    # ======================================================
-    # 2. PUNTOS DE HORAS (EJE SECUNDARIO)
-    # ======================================================
-    for tipo in ["Funcionamiento", "Ralenti", "Transporte"]:
-        dh = dfh[dfh["TipoHora"] == tipo].copy()
-        dh["x_num"] = dh["Máquina"].map(x_index) + OFFSET[tipo]
-
-        fig.add_trace(go.Scatter(
-            x=dh["x_num"],
-            y=dh["Horas"],
-            yaxis="y2",
-            mode="markers+text",
-            text=dh["Horas"].round(1),
-            textposition="bottom center",
-            textfont=dict(color="black"),   
-            marker=dict(
-                size=6,
-                color=COLORS_PT[tipo],
-                line=dict(color="black", width=0.5)
-            ),
-            showlegend=False
-        ))
-
-    # ======================================================
-    # 3. HORAS MOTOR (EJE SECUNDARIO)
-    # ======================================================
-    hm = dfh[dfh["TipoHora"] == "Horas_Motor"].copy()
-    hm["x_num"] = hm["Máquina"].map(x_index)
-
-    fig.add_trace(go.Scatter(
-        x=hm["x_num"],
-        y=hm["Horas"],
-        yaxis="y2",
-        mode="markers+text",
-        text=hm["Horas"].round(1),
-        textposition="top center",
-        marker=dict(color="red", size=13),
-        textfont=dict(color="red"),
-        name="Horas motor"
-    ))
-
-    # ======================================================
-    # 4. LÍNEAS DE META (%)
-    # ======================================================
-    xmin = min(x_index.values()) - 0.6
-    xmax = max(x_index.values()) + 0.6
-
-    fig.add_trace(go.Scatter(
-        x=[xmin, xmax],
-        y=[meta_func, meta_func],
-        mode="lines+text",
-        line=dict(color=COLOR_META_F, dash="dash", width=2),
-        text=[None, f"{meta_func}%"],
-        textposition="middle right",
-        name="Meta funcionamiento"
-    ))
-
-    fig.add_trace(go.Scatter(
-        x=[xmin, xmax],
-        y=[meta_ralenti, meta_ralenti],
-        mode="lines+text",
-        line=dict(color=COLOR_META_R, dash="dash", width=2),
-        text=[None, f"{meta_ralenti}%"],
-        textposition="middle right",
-        name="Meta ralentí"
-    ))
-
-    # ======================================================
-    # 5. LAYOUT (EJE SECUNDARIO)
-    # ======================================================
-    # ======================================================
-# TÍTULOS DINÁMICOS
-# ======================================================
-    if periodo == "Diario vs Semana":
-        titulo_fig = f"Tiempos de operación — Diario | {grupo} | Semana {semana_ref}"
-        etiqueta_prom = "Promedio semanal"
-    else:
-        titulo_fig = f"Tiempos de operación — Semanal | {grupo}| Semana  {semana_ref}"
-        etiqueta_prom = "Promedio mensual"
-
-    
-    
-    fig.update_layout(
-        height=650,
-        template="simple_white",
-        barmode="overlay",
-        title=titulo_fig,
-
-        yaxis=dict(
-            title="% Tiempo",
-            range=[0, 100]
-        ),
-
-        yaxis2=dict(
-            title="Horas",
-            linecolor="red", 
-            tickcolor="red",    
-            overlaying="y",
-            side="right",
-            range=[0, dfh["Horas"].max() * 1.15],  # ← empieza en 0
-            showgrid=False
-        ),
-
-
-        legend=dict(orientation="h", y=-0.25),
-        margin=dict(l=50, r=60, t=80, b=120)
+    diagnostico = st.sidebar.toggle(
+        "🩺 Diagnóstico de rendimiento",
+        help="Tiempo, filas y pico de memoria por etapa (también en el registro JSON lines)."
     )
 
-    fig.update_xaxes(
-        tickmode="array",
-        tickvals=list(x_index.values()),
-        ticktext=maquinas,
-        title_text="Máquina"
-    )
+    # Sin archivos cargados: última instantánea de la carpeta vigilada
+    # (aquí solo sus datos; el Parquet se lee cuando cambia)
+    meta = None
+    if vigilante is not None:
+        if vigilante.estado["error"]:
+            st.sidebar.warning(f"📡 {vigilante.estado['error']}")
+        if not archivos_diarios:
+            meta = meta_instantanea()
 
-    # ======================================================
-    # LEYENDA PROMEDIO SEMANAL
-    # ======================================================
-    fig.add_trace(go.Bar(
-        x=[None], y=[None],
-        marker_color=COLOR_FUNC_WEEK,
-        name= f"Funcionamiento · {etiqueta_prom}"
-    ))
+    if not archivos_diarios and meta is None:
+        return
 
-    fig.add_trace(go.Bar(
-        x=[None], y=[None],
-        marker_color=COLOR_RAL_WEEK,
-        name= f"Ralentí · {etiqueta_prom}"
-    ))
+    registro = Registro("panel", memoria=diagnostico or None)
 
-    fig.add_trace(go.Bar(
-        x=[None], y=[None],
-        marker_color=COLOR_TRANS_WEEK,
-        name= f"Transporte · {etiqueta_prom}"
-    ))
+    try:
+        if archivos_diarios:
+            carga = carga_subida(archivos_diarios, archivos_semanales, registro)
+        else:
+            carga = carga_sesion(("carpeta", meta["actualizado"]), ingestar_instantanea)
+        procesar_panel(carga, periodo, ponderacion, registro)
+    finally:
+        registro.escribir()
 
-    return fig
+        if diagnostico:
+            with st.sidebar.expander("🩺 Rendimiento por etapa", expanded=True):
+                etapas = registro.tabla()
+                st.dataframe(etapas, hide_index=True, use_container_width=True)
+                st.caption(
+                    f"Total: {etapas['segundos'].sum():.2f} s | registro: {REGISTRO_RUTA}"
+                )
 
 
-def insights_diarios(df_pct, df_long_semanal, grupo, meta_f, meta_r):
+def carga_sesion(clave, ingerir):
     """
-    Genera insights ejecutivos diarios por grupo y por máquina,
-    incluyendo comparación vs promedio semanal con flechas (±3 pp).
+    Datos compartidos de la sesión: se ingieren una sola vez por carga
+    (misma `clave`) y los reruns siguientes (cambio de período, de grupo,
+    exportar) los reutilizan. Los análisis por período se guardan junto
+    a la carga.
     """
+    carga = st.session_state.get("carga")
 
-    insights = []
-
-    # ======================================================
-    # 0. FILTRO GRUPO
-    # ======================================================
-    df_g = df_pct[df_pct["Grupo_trabajo"] == grupo].copy()
-    df_w = df_long_semanal[df_long_semanal["Grupo_trabajo"] == grupo].copy()
-
-    # ======================================================
-    # 1. RESUMEN EJECUTIVO DEL GRUPO
-    # ======================================================
-    resumen_grp = (
-        df_g
-        .groupby("Tipo")["Porcentaje"]
-        .mean()
-        .to_dict()
-    )
+    if carga is None or carga["clave"] != clave:
+        df_d, avisos = ingerir()
+        carga = {
+            "clave": clave,
+            "df_d": df_d,
+            "avisos": avisos,
+            "sin_maestro": maestro().sin_maestro(df_d),
+            "periodos": {},
+        }
+        st.session_state["carga"] = carga
 
-    pf = resumen_grp.get("Funcionamiento", 0)
-    pr = resumen_grp.get("Ralenti", 0)
+    return carga
 
-    if pf < meta_f - 8 or pr > meta_r + 6:
-        estado = "🔴 Riesgo operativo alto"
-    elif pf < meta_f or pr > meta_r:
-        estado = "🟡 Riesgo operativo moderado"
-    else:
-        estado = "🟢 Operación bajo control"
 
-    insights.append(
-        f"{estado} — Promedio grupo: Funcionamiento {pf:.1f}% | Ralentí {pr:.1f}%."
-    )
-
-    # ======================================================
-    # 2. PROMEDIOS DIARIOS POR MÁQUINA
-    # ======================================================
-    df_dia = (
-        df_g
-        .groupby(["Máquina", "Tipo"])["Porcentaje"]
-        .mean()
-        .unstack()
-        .reset_index()
+def carga_subida(archivos_diarios, archivos_semanales, registro):
+    """
+    Carga de los archivos subidos; la clave cambia al subir o quitar uno.
+    """
+    archivos_semanales = archivos_semanales or []
+    clave = (
+        "subidos",
+        tuple(f.file_id for f in archivos_diarios),
+        tuple(f.file_id for f in archivos_semanales),
     )
-
-    for col in ["Funcionamiento", "Ralenti", "Transporte"]:
-        if col not in df_dia.columns:
-            df_dia[col] = 0
-
-    # ======================================================
-    # 3. PROMEDIOS SEMANALES POR MÁQUINA
-    # ======================================================
-    df_sem = (
-        df_w
-        .groupby(["Máquina", "Tipo"])["Porcentaje"]
-        .mean()
-        .unstack()
-        .reset_index()
+    return carga_sesion(
+        clave, lambda: ingestar_subidos(archivos_diarios, archivos_semanales, registro)
     )
 
-    for col in ["Funcionamiento", "Ralenti", "Transporte"]:
-        if col not in df_sem.columns:
-            df_sem[col] = None
 
-    df_sem = df_sem.set_index("Máquina")
-
-    # ======================================================
-    # 4. DIAGNÓSTICO POR MÁQUINA (SEMÁFORO + TENDENCIA)
-    # ======================================================
-    diagnosticos = []
-
-    for _, row in df_dia.iterrows():
-        maq = row["Máquina"]
-        f = row["Funcionamiento"]
-        r = row["Ralenti"]
-
-        wf = df_sem.loc[maq, "Funcionamiento"] if maq in df_sem.index else None
-        wr = df_sem.loc[maq, "Ralenti"] if maq in df_sem.index else None
-
-        # ---- SEMÁFORO OPERATIVO ----
-        if f < meta_f - 8 or r > meta_r + 6:
-            sem = "🔴"
-            nivel = "Crítica"
-        elif f < meta_f or r > meta_r:
-            sem = "🟡"
-            nivel = "En observación"
-        else:
-            sem = "🟢"
-            nivel = "Estable"
-
-        # ---- TENDENCIA VS SEMANA (±3 pp) ----
-        trend_f = "➖ en línea con su semana"
-        trend_r = "➖ en línea con su semana"
-
-        if wf is not None:
-            if f >= wf + 3:
-                trend_f = "⬆️ mejor que su promedio semanal"
-            elif f <= wf - 3:
-                trend_f = "⬇️ peor que su promedio semanal"
-
-        if wr is not None:
-            # En ralentí, MENOR es mejor
-            if r <= wr - 3:
-                trend_r = "⬆️ mejor que su promedio semanal"
-            elif r >= wr + 3:
-                trend_r = "⬇️ peor que su promedio semanal"
-
-        impacto = (meta_f - f) + max(0, r - meta_r)
-
-        diagnosticos.append({
-            "Máquina": maq,
-            "Funcionamiento": f,
-            "Ralenti": r,
-            "Semáforo": sem,
-            "Nivel": nivel,
-            "Impacto": impacto,
-            "Trend_F": trend_f,
-            "Trend_R": trend_r
-        })
-
-    df_diag = pd.DataFrame(diagnosticos)
-
-    # ======================================================
-    # 5. RANKING DE MÁQUINAS PRIORITARIAS
-    # ======================================================
-    df_crit = (
-        df_diag
-        .sort_values("Impacto", ascending=False)
-        .head(4)
-    )
-
-    if not df_crit.empty:
-        insights.append("🚜 Diagnóstico por máquina (prioridad):")
+def ingestar_subidos(archivos_diarios, archivos_semanales, registro):
+    """
+    Lectura de los archivos cargados e ingesta al histórico.
+    Devuelve los diarios unidos y los avisos de lectura.
+    """
 
-        for _, r in df_crit.iterrows():
-            insights.append(
-                f"{r['Semáforo']} {r['Máquina']} — "
-                f"Func {r['Funcionamiento']:.1f}% {r['Trend_F']} | "
-                f"Ral {r['Ralenti']:.1f}% {r['Trend_R']} "
-                f"→ {r['Nivel']}"
-            )
-    else:
-        insights.append("🚜 Todas las máquinas operan dentro de parámetros esperados.")
-
-    # ======================================================
-    # 6. ACCIÓN OPERATIVA EJECUTIVA
-    # ======================================================
-    if estado.startswith("🔴"):
-        cierre = (
-            "🎯 Acción inmediata: intervenir máquinas críticas con bajo funcionamiento "
-            "y alto ralentí. Priorizar control de tiempos muertos y coordinación operativa."
-        )
-    elif estado.startswith("🟡"):
-        cierre = (
-            "🎯 Acción recomendada: seguimiento diario por máquina en observación "
-            "y validación de causas operativas para evitar escalamiento del riesgo."
-        )
-    else:
-        cierre = (
-            "🎯 Acción recomendada: mantener condiciones operativas actuales "
-            "y monitoreo rutinario del desempeño."
+    # === CARGA (en paralelo) E INGESTA AL HISTÓRICO ===
+    try:
+        cargas_d, t_diario = cargar_varios(archivos_diarios, registro)
+        cargas_s, t_semanal = cargar_varios(archivos_semanales, registro)
+
+        with registro.etapa("unir_exports", filas_entrada=len(cargas_d)) as e:
+            df_d = unir_exports([df for _, df, _, _ in cargas_d])
+            e["filas_salida"] = len(df_d)
+
+        # Semanales primero: ante la misma (Máquina, Fecha) gana el último
+        # registrado, el diario (igual que en lote.py)
+        nuevas = 0
+        for archivo, df, _, clave in cargas_s + cargas_d:
+            with registro.etapa("registrar_historial", filas_entrada=len(df), archivo=archivo.name) as e:
+                e["filas_salida"] = registrar_historial(df, clave)
+                nuevas += e["filas_salida"]
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+
+    def resumen_lectura(etiqueta, cargas, segundos):
+        en_cache = sum(desde_cache for _, _, desde_cache, _ in cargas)
+        return (
+            f"{len(cargas)} {etiqueta} {segundos:.2f} s"
+            + (f" ({en_cache} en caché)" if en_cache else "")
         )
 
-    insights.append(cierre)
-
-    return insights
+    lectura = "⏱ Lectura: " + resumen_lectura("diario(s)", cargas_d, t_diario)
+    if cargas_s:
+        lectura += " | " + resumen_lectura("semanal(es)", cargas_s, t_semanal)
+    avisos = [lectura]
+    if nuevas:
+        avisos.append(f"🗄 {nuevas} registros nuevos o corregidos en el histórico")
 
+    return df_d, avisos
 
 
-def insights_semanales_operativos(df_long_semanal, df_mensual, grupo, meta_f, meta_r):
+def ingestar_instantanea():
     """
-    Genera insights ejecutivos diarios por grupo y por máquina,
-    incluyendo comparación vs promedio semanal con flechas (±3 pp).
+    Lectura de la instantánea de la carpeta vigilada.
+    Devuelve sus filas y el aviso con su fecha.
     """
+    df, meta = leer_instantanea()
+    if df is None:
+        st.warning("📡 La instantánea de la carpeta vigilada no se pudo leer; se reintenta en el próximo rerun.")
+        st.stop()
+
+    return df, [
+        f"📡 Carpeta vigilada: {meta['fecha']} ({meta['filas']} filas), "
+        f"actualizada {meta['actualizado']}"
+    ]
 
-    insights = []   
-
-    # ======================================================
-    # 0. FILTRO GRUPO
-    # ======================================================
-    df_g = df_pct[df_pct["Grupo_trabajo"] == grupo].copy()
-    df_w = df_long_semanal[df_long_semanal["Grupo_trabajo"] == grupo].copy()
-
-    # ======================================================
-    # 1. RESUMEN EJECUTIVO DEL GRUPO
-    # ======================================================
-    resumen_grp = (
-        df_g
-        .groupby("Tipo")["Porcentaje"]
-        .mean()
-        .to_dict()
-    )
 
-    pf = resumen_grp.get("Funcionamiento", 0)
-    pr = resumen_grp.get("Ralenti", 0)
+def procesar_panel(carga, periodo, ponderacion, registro):
+    """
+    Un rerun del panel sobre los diarios (cargados o de la carpeta vigilada),
+    etapa por etapa. Las láminas por grupo se dibujan en un fragmento aparte.
+    """
+    df_d = carga["df_d"]
 
-    if pf < meta_f - 8 or pr > meta_r + 6:
-        estado = "🔴 Riesgo operativo alto"
-    elif pf < meta_f or pr > meta_r:
-        estado = "🟡 Riesgo operativo moderado"
-    else:
-        estado = "🟢 Operación bajo control"
+    for aviso in carga["avisos"]:
+        st.sidebar.caption(aviso)
 
-    insights.append(
-        f"{estado} — Promedio grupo: Funcionamiento {pf:.1f}% | Ralentí {pr:.1f}%."
-    )
+    sin_maestro = carga["sin_maestro"]
+    if sin_maestro:
+        st.sidebar.warning(
+            f"⚠ {len(sin_maestro)} máquina(s) sin registro en el maestro: "
+            + ", ".join(sin_maestro[:20])
+            + (" …" if len(sin_maestro) > 20 else "")
+        )
 
-    # ======================================================
-    # 2. PROMEDIOS DIARIOS POR MÁQUINA
-    # ======================================================
-    df_dia = (
-        df_g
-        .groupby(["Máquina", "Tipo"])["Porcentaje"]
-        .mean()
-        .unstack()
-        .reset_index()
-    )
+    grupos, sin_metas = con_metas(sorted(df_d["Grupo_trabajo"].dropna().unique()))
+    if sin_metas:
+        st.sidebar.warning(
+            f"⚠ Grupo(s) sin metas, sin lámina: {', '.join(sin_metas)}"
+        )
 
-    for col in ["Funcionamiento", "Ralenti", "Transporte"]:
-        if col not in df_dia.columns:
-            df_dia[col] = 0
-
-    # ======================================================
-    # 3. PROMEDIOS SEMANALES POR MÁQUINA
-    # ======================================================
-    df_sem = (
-        df_w
-        .groupby(["Máquina", "Tipo"])["Porcentaje"]
-        .mean()
-        .unstack()
-        .reset_index()
-    )
+    # === PERÍODOS DE REFERENCIA ===
+    referencia = fecha_referencia(df_d)
+    if referencia is None:
+        st.error("Los archivos no tienen fechas de inicio válidas.")
+        st.stop()
+    fecha_actual, semana_actual = referencia
+
+    # === ACTUAL, BASE Y DIAGNÓSTICO desde el cubo (una vez por carga, período y ponderación) ===
+    if (periodo, ponderacion) not in carga["periodos"]:
+        with registro.etapa("analizar_periodo", ponderacion=ponderacion) as e:
+            df_actual, df_base, df_diag = analizar_periodo(fecha_actual, periodo, ponderacion)
+            # indexadas por grupo: cada lámina toma su tramo sin recorrer la flota
+            carga["periodos"][periodo, ponderacion] = {
+                "actual": particionar(df_actual),
+                "base": particionar(df_base),
+                "diag": particionar(df_diag),
+                "periodo": periodo,
+                "semana": semana_actual,
+            }
+            e["filas_salida"] = len(df_actual)
+
+    analisis = carga["periodos"][periodo, ponderacion]
+
+    with st.sidebar.expander("🧠 Memoria de la sesión"):
+        memoria = reporte_memoria(
+            archivo_diario=df_d,
+            actual=analisis["actual"].tabla,
+            base=analisis["base"].tabla,
+        )
+        st.dataframe(memoria, hide_index=True, use_container_width=True)
+        st.caption(f"Total: {memoria['MB'].sum():.2f} MB")
 
-    for col in ["Funcionamiento", "Ralenti", "Transporte"]:
-        if col not in df_sem.columns:
-            df_sem[col] = None
+    # === EXPORTACIÓN POR LOTE ===
+    st.sidebar.header("📦 Exportar reportes")
+    grupos_export = st.sidebar.multiselect("Grupos", grupos, default=grupos)
+    formato_export = st.sidebar.radio("Formato", ["zip", "pdf"], horizontal=True)
+    exportar = st.sidebar.button("Generar reportes")
 
-    df_sem = df_sem.set_index("Máquina")
+    st.markdown("---")
 
-    # ======================================================
-    # 4. DIAGNÓSTICO POR MÁQUINA (SEMÁFORO + TENDENCIA)
-    # ======================================================
-    diagnosticos = []
+    laminas(analisis, grupos, registro)
 
-    for _, row in df_dia.iterrows():
-        maq = row["Máquina"]
-        f = row["Funcionamiento"]
-        r = row["Ralenti"]
+    if exportar and grupos_export:
+        from exportar import exportar_lote
 
-        wf = df_sem.loc[maq, "Funcionamiento"] if maq in df_sem.index else None
-        wr = df_sem.loc[maq, "Ralenti"] if maq in df_sem.index else None
+        # Las láminas no vistas se arman solo al exportar
+        reportes = list(construir_laminas(
+            analisis["actual"], analisis["base"], analisis["diag"],
+            grupos_export, analisis["periodo"], analisis["semana"], registro
+        ))
 
-        # ---- SEMÁFORO OPERATIVO ----
-        if f < meta_f - 8 or r > meta_r + 6:
-            sem = "🔴"
-            nivel = "Crítica"
-        elif f < meta_f or r > meta_r:
-            sem = "🟡"
-            nivel = "En observación"
+        try:
+            with st.spinner("Generando reportes..."), \
+                    registro.etapa("exportar", filas_entrada=len(reportes)) as e:
+                archivo = exportar_lote(reportes, formato_export)
+                e["bytes"] = len(archivo)
+        except RuntimeError as e:
+            st.sidebar.error(str(e))
         else:
-            sem = "🟢"
-            nivel = "Estable"
-
-        # ---- TENDENCIA VS SEMANA (±3 pp) ----
-        trend_f = "➖ en línea con su mes"
-        trend_r = "➖ en línea con su mes"
-
-        if wf is not None:
-            if f >= wf + 3:
-                trend_f = "⬆️ mejor que su promedio mensual"
-            elif f <= wf - 3:
-                trend_f = "⬇️ peor que su promedio mensual"
-
-        if wr is not None:
-            # En ralentí, MENOR es mejor
-            if r <= wr - 3:
-                trend_r = "⬆️ mejor que su promedio mensual"
-            elif r >= wr + 3:
-                trend_r = "⬇️ peor que su promedio mensual"
-
-        impacto = (meta_f - f) + max(0, r - meta_r)
-
-        diagnosticos.append({
-            "Máquina": maq,
-            "Funcionamiento": f,
-            "Ralenti": r,
-            "Semáforo": sem,
-            "Nivel": nivel,
-            "Impacto": impacto,
-            "Trend_F": trend_f,
-            "Trend_R": trend_r
-        })
-
-    df_diag = pd.DataFrame(diagnosticos)
-
-    # ======================================================
-    # 5. RANKING DE MÁQUINAS PRIORITARIAS
-    # ======================================================
-    df_crit = (
-        df_diag
-        .sort_values("Impacto", ascending=False)
-        .head(4)
-    )
-
-    if not df_crit.empty:
-        insights.append("🚜 Diagnóstico por máquina:")
-
-        for _, r in df_crit.iterrows():
-            insights.append(
-                f"{r['Semáforo']} {r['Máquina']} — "
-                f"Func {r['Funcionamiento']:.1f}% {r['Trend_F']} | "
-                f"Ral {r['Ralenti']:.1f}% {r['Trend_R']} "
-                f"→ {r['Nivel']}"
+            st.sidebar.download_button(
+                "⬇️ Descargar reportes",
+                data=archivo,
+                file_name=f"reportes_maquinaria.{formato_export}",
+                mime="application/pdf" if formato_export == "pdf" else "application/zip"
             )
-    else:
-        insights.append("🚜 Todas las máquinas operan dentro de parámetros esperados.")
-
-    # ======================================================
-    # 6. ACCIÓN OPERATIVA EJECUTIVA
-    # ======================================================
-    if estado.startswith("🔴"):
-        cierre = (
-            "🎯 Acción inmediata: intervenir máquinas críticas con bajo funcionamiento "
-            "y alto ralentí. Priorizar control de tiempos muertos y coordinación operativa."
-        )
-    elif estado.startswith("🟡"):
-        cierre = (
-            "🎯 Acción recomendada: seguimiento diario por máquina en observación "
-            "y validación de causas operativas para evitar escalamiento del riesgo."
-        )
-    else:
-        cierre = (
-            "🎯 Acción recomendada: mantener condiciones operativas actuales "
-            "y monitoreo rutinario del desempeño."
-        )
 
-    insights.append(cierre)
 
-    return insights
-
-
-
-
-def exportar_reporte_png(fig, insights, grupo, nombre="reporte_maquinaria.png"):
+@st.fragment
+def laminas(analisis, grupos, registro):
     """
-    Genera un PNG ejecutivo con:
-    - gráfico (Plotly) a la izquierda
-    - panel insights a la derecha
-    Usando base64 para evitar que el gráfico salga roto.
+    Selector de grupos y sus láminas. Es un fragmento: cambiar la
+    selección solo vuelve a correr esta función, y solo se dibujan los
+    grupos elegidos (la latencia depende de lo que se mira, no de la flota).
+    Las láminas se construyen en paralelo y cada una se dibuja apenas está.
     """
-
-    # 1) Render del gráfico Plotly a PNG (tamaño fijo para evitar cortes)
-    tmp_png = f"grafico_{grupo}.png".replace(" ", "_").replace("/", "_")
-    fig.write_image(tmp_png, width=1200, height=700, scale=2)  # clave: size fijo
-
-    # 2) Convertir imagen a base64 (evita rutas rotas en html2image)
-    with open(tmp_png, "rb") as f:
-        img_b64 = base64.b64encode(f.read()).decode("utf-8")
-
-    # 3) HTML del reporte (con imagen embebida)
-    texto_html = "<br>".join(insights)
-
-    html = f"""
-    <html>
-    <head>
-    <meta charset="utf-8">
-    <style>
-      body {{
-        font-family: Arial, sans-serif;
-        background: white;
-        margin: 0;
-        padding: 24px;
-      }}
-      .container {{
-        display: flex;
-        gap: 24px;
-        align-items: flex-start;
-      }}
-      .left {{
-        width: 70%;
-      }}
-      .right {{
-        width: 30%;
-        background-color: #F8F9F7;
-        border: 3px solid #1A7335;
-        border-radius: 16px;
-        padding: 18px;
-        box-sizing: border-box;
-      }}
-      .title {{
-        color: #1A7335;
-        margin: 0 0 6px 0;
-        font-size: 18px;
-        font-weight: 700;
-      }}
-      .subtitle {{
-        margin: 0 0 12px 0;
-        font-size: 14px;
-        font-weight: 700;
-        color: #000;
-      }}
-      .ins {{
-        font-size: 13px;
-        line-height: 1.6;
-        color: #000;
-      }}
-      img {{
-        width: 100%;
-        height: auto;
-        display: block;
-      }}
-    </style>
-    </head>
-    <body>
-      <div class="container">
-        <div class="left">
-          <img src="data:image/png;base64,{img_b64}" />
-        </div>
-        <div class="right">
-          <div class="title">🧭 Diagnóstico Operativo</div>
-          <div class="subtitle">{grupo}</div>
-          <div class="ins">{texto_html}</div>
-        </div>
-      </div>
-    </body>
-    </html>
-    """
-
-    # 4) HTML -> PNG
-    hti = Html2Image(output_path=".")
-    hti.screenshot(
-        html_str=html,
-        save_as=nombre,
-        size=(1800, 950)   # canvas del reporte
-    )
-
-    # 5) Limpieza del temporal
-    try:
-        os.remove(tmp_png)
-    except Exception:
-        pass
-
-    return nombre
-
-# ============================================================
-# 6. SEMANAL
-# ============================================================
-
-def preparar_semanal(df):
-    df["Fecha"] = pd.to_datetime(
-        df["Fecha de inicio"],
-        dayfirst=True,  
-        errors="coerce"
+    vista = st.pills(
+        "Grupos de trabajo",
+        grupos,
+        selection_mode="multi",
+        default=grupos[:1],
+        key="grupos_vista"
     )
 
-    df["Semana"] = df["Fecha"].dt.isocalendar().week
-
-    df_pct = df[[
-        "Máquina", "Semana", "Grupo_trabajo",
-        "Utilización En funcionamiento (%)",
-        "Utilización Transporte (%)",
-        "Utilización Ralentí (%)"
-    ]].copy()
+    # en el orden del selector, no en el de la elección
+    vista = [g for g in grupos if g in (vista or [])]
 
-    df_pct.columns = ["Máquina", "Semana", "Grupo_trabajo", "Funcionamiento", "Transporte", "Ralenti"]
-    df_long = df_pct.melt(id_vars=["Máquina", "Semana", "Grupo_trabajo"], var_name="Tipo", value_name="Porcentaje")
-    df_long["Porcentaje"] *= 100
+    for grupo, fig_diario, insights in construir_laminas(
+        analisis["actual"], analisis["base"], analisis["diag"],
+        vista, analisis["periodo"], analisis["semana"], registro
+    ):
+        lamina(grupo, analisis["periodo"], fig_diario, insights, registro)
 
-    return df_long
-
-def boxplot_semanal(df_long, grupo):
-    df_g = df_long[df_long["Grupo_trabajo"] == grupo]
-
-    fig = px.box(
-        df_g,
-        x="Tipo",
-        y="Porcentaje",
-        color="Semana",
-        title=f"📦 Comportamiento semanal — {grupo}",
-        color_discrete_sequence=px.colors.qualitative.Set2,
-        points="all"
-    )
+    # En un rerun del fragmento el de main() no corre: se agregan aquí
+    registro.escribir()
 
-    fig.update_layout(height=550, template="simple_white")
-
-    return fig
 
+@st.fragment
+def lamina(grupo, periodo, fig_diario, insights, registro):
+    """
+    Lámina de un grupo (gráfico y diagnóstico), como fragmento propio.
+    """
+    #st.markdown(f"## 🔷 {grupo}")
 
-def insights_semanales(df_long, grupo):
-    df_g = df_long[df_long["Grupo_trabajo"] == grupo]
-    semanas = sorted(df_g["Semana"].unique())
+    #st.markdown("<div class='card'>", unsafe_allow_html=True)
 
-    if len(semanas) < 2:
-        return ["⚠ Solo hay datos de una semana."]
+    # === LAYOUT TIPO LÁMINA ===
+    col_graf, col_txt = st.columns([0.7, 0.3], gap="large")
 
-    w1, w2 = semanas[-2], semanas[-1]
-    txt = [f"📅 Comparación Semana {w1} → Semana {w2}"]
+    with col_graf:
+        #st.markdown("### 📊 Desempeño Diario")
+        with registro.etapa("enviar_figura", grupo):
+            st.plotly_chart(fig_diario, use_container_width=True)
 
-    for tipo in ["Funcionamiento", "Ralenti", "Transporte"]:
-        prev = df_g[(df_g["Semana"]==w1)&(df_g["Tipo"]==tipo)]["Porcentaje"].mean()
-        curr = df_g[(df_g["Semana"]==w2)&(df_g["Tipo"]==tipo)]["Porcentaje"].mean()
+    with col_txt:
 
-        if curr > prev:
-            txt.append(f"📈 {tipo}: aumentó {curr-prev:.1f}%")
+        resumen = insights[0]
+        diagnostico = insights[1:-1]
+        accion = insights[-1]
+        # === TÍTULOS DINÁMICOS SEGÚN PERÍODO ===
+        if periodo == "Diario vs Semana":
+            titulo_diag = "🧭 Diagnóstico Diario"
+            subtitulo = "Comparación: Ayer vs Promedio semanal"
         else:
-            txt.append(f"📉 {tipo}: disminuyó {prev-curr:.1f}%")
+            titulo_diag = "🧭 Diagnóstico Semanal"
+            subtitulo = "Comparación: Semana actual vs Promedio mensual"
+
+        html = f"""
+        <div style="
+            background-color:#F8F9F7;
+            border:3px solid #1A7335;
+            border-radius:16px;
+            padding:22px;
+            font-family: Arial, sans-serif;
+            box-sizing: border-box;
+        ">
 
-    return txt
+            <div style="
+                color:#1A7335;
+                font-size:18px;
+                font-weight:700;
+                margin-bottom:2px;
+            ">
+                {titulo_diag}
+            </div>
 
+            <div style="
+                font-size:12px;
+                color:#555;
+                margin-bottom:10px;
+            ">
+                {subtitulo}
+            </div>
 
 
-# ============================================================
-# 7. UI — STREAMLIT
-# ============================================================
+            <!-- GRUPO (MÁS GRANDE) -->
+            <div style="
+                font-size:22px;
+                font-weight:800;
+                margin-bottom:14px;
+                color:#000;
+            ">
+                {grupo}
+            </div>
 
-st.sidebar.title("🚜 Panel de Maquinaria")
-menu = "Reporte Completo"
+            <!-- RESUMEN -->
+            <div style="
+                font-size:13px;
+                line-height:1.6;
+                margin-bottom:14px;
+            ">
+                {resumen}
+            </div>
 
+            <hr style="border:none; border-top:1px solid #C7D8CC; margin:14px 0;">
 
-st.title("📊 Seguimiento diario de la maquinaria — Ingenio Providencia")
+            <!-- DIAGNÓSTICO POR MÁQUINA -->
+            <div style="
+                font-size:13px;
+                line-height:1.6;
+                margin-bottom:14px;
+            ">
+                {"<br>".join(diagnostico)}
+            </div>
 
-#st.markdown("<hr>", unsafe_allow_html=True)
+            <hr style="border:none; border-top:1px solid #C7D8CC; margin:14px 0;">
 
-# ------------------------------------------------------------
-# REPORTE DIARIO
-# ------------------------------------------------------------
-st.sidebar.header("📊 Período de análisis")
+            <!-- ACCIÓN -->
+            <div style="
+                font-size:13px;
+                line-height:1.6;
+                font-weight:600;
+            ">
+                {accion}
+            </div>
 
-periodo = st.sidebar.radio(
-    "Comparación de desempeño",
-    options=[
-        "Diario vs Semana",
-        "Semana vs Mes"
-    ],
-    index=0
-)
+        </div>
+        """
 
-#st.subheader("Seguimiento diario de la maquinaria")
+        with registro.etapa("panel_html", grupo, bytes=len(html.encode("utf-8"))):
+            components.html(html, height=600)
 
-st.sidebar.header("📂 Cargue de Información")
 
-archivo_diario = st.sidebar.file_uploader(
-    "📅 Archivo diario (Operation Center)",
-    type=["xlsx"],
-    key="diario"
-)
 
-archivo_semanal = st.sidebar.file_uploader(
-    "📆 Archivo semanal (Operation Center)",
-    type=["xlsx"],
-    key="semanal"
-)
+    st.markdown("</div>", unsafe_allow_html=True)
 
-if archivo_diario and archivo_semanal:
 
-    # === CARGA Y PREPARACIÓN ===
-    df_d = cargar_excel(archivo_diario)
-    df_d = unir_maestro(df_d)
 
-    df_s = cargar_excel(archivo_semanal)
-    df_s = unir_maestro(df_s)
-    df_long = preparar_semanal(df_s)
+    # === INSIGHTS ===
+    #st.markdown("### 📌 Insights del Día")
+    #for ins in insights_diarios(df_pct, grupo, metas["func"], metas["ralenti"]):
+    #    st.write(ins)
 
-    grupos = sorted(df_d["Grupo_trabajo"].dropna().unique())
 
     st.markdown("---")
-    # Semana más reciente disponible en el archivo semanal
-    semana_actual = int(df_long["Semana"].max())
-
-    for grupo in grupos:
-        #st.markdown(f"## 🔷 {grupo}")
-
-        metas = METAS[grupo]
-
-        # === DIARIO ===
-        df_pct, df_h, fecha_actual, semana_actual = preparar_diario(df_d, metas["escala"])
-        fig_diario = grafico_diario(
-            df_pct,
-            df_h,
-            df_long,          # ← data semanal
-            grupo,
-            metas["func"],
-            metas["ralenti"],
-            periodo,
-            semana_actual
-        )
-
-
-        #st.markdown("<div class='card'>", unsafe_allow_html=True)
-
-        
-        #st.plotly_chart(fig_diario, use_container_width=True)
-        # ✅ AQUÍ SE DEFINE insights (antes de usarlo en el HTML)
-        if periodo == "Diario vs Semana":
-            insights = insights_diarios(
-                df_pct,
-                df_long,
-                grupo,
-                metas["func"],
-                metas["ralenti"]
-            )
 
-        elif periodo == "Semana vs Mes":
-            insights = insights_semanales_operativos(
-                df_long,
-                None,              # luego irá el mensual
-                grupo,
-                metas["func"],
-                metas["ralenti"]
-            )
-
-        # === LAYOUT TIPO LÁMINA ===
-        col_graf, col_txt = st.columns([0.7, 0.3], gap="large")
-
-        with col_graf:
-            #st.markdown("### 📊 Desempeño Diario")
-            st.plotly_chart(fig_diario, use_container_width=True)
-
-        import streamlit.components.v1 as components
-
-        with col_txt:
-
-            resumen = insights[0]
-            diagnostico = insights[1:-1]
-            accion = insights[-1]
-            # === TÍTULOS DINÁMICOS SEGÚN PERÍODO ===
-            if periodo == "Diario vs Semana":
-                titulo_diag = "🧭 Diagnóstico Diario"
-                subtitulo = "Comparación: Ayer vs Promedio semanal"
-            else:
-                titulo_diag = "🧭 Diagnóstico Semanal"
-                subtitulo = "Comparación: Semana actual vs Promedio mensual"
-
-            html = f"""
-            <div style="
-                background-color:#F8F9F7;
-                border:3px solid #1A7335;
-                border-radius:16px;
-                padding:22px;
-                font-family: Arial, sans-serif;
-                box-sizing: border-box;
-            ">
-
-                <div style="
-                    color:#1A7335;
-                    font-size:18px;
-                    font-weight:700;
-                    margin-bottom:2px;
-                ">
-                    {titulo_diag}
-                </div>
-
-                <div style="
-                    font-size:12px;
-                    color:#555;
-                    margin-bottom:10px;
-                ">
-                    {subtitulo}
-                </div>
-
-
-                <!-- GRUPO (MÁS GRANDE) -->
-                <div style="
-                    font-size:22px;
-                    font-weight:800;
-                    margin-bottom:14px;
-                    color:#000;
-                ">
-                    {grupo}
-                </div>
-
-                <!-- RESUMEN -->
-                <div style="
-                    font-size:13px;
-                    line-height:1.6;
-                    margin-bottom:14px;
-                ">
-                    {resumen}
-                </div>
-
-                <hr style="border:none; border-top:1px solid #C7D8CC; margin:14px 0;">
-
-                <!-- DIAGNÓSTICO POR MÁQUINA -->
-                <div style="
-                    font-size:13px;
-                    line-height:1.6;
-                    margin-bottom:14px;
-                ">
-                    {"<br>".join(diagnostico)}
-                </div>
-
-                <hr style="border:none; border-top:1px solid #C7D8CC; margin:14px 0;">
-
-                <!-- ACCIÓN -->
-                <div style="
-                    font-size:13px;
-                    line-height:1.6;
-                    font-weight:600;
-                ">
-                    {accion}
-                </div>
 
-            </div>
-            """
-
-            components.html(html, height=600)
-
-
-
-        st.markdown("</div>", unsafe_allow_html=True)
-
-
-
-        # === INSIGHTS ===
-        #st.markdown("### 📌 Insights del Día")
-        #for ins in insights_diarios(df_pct, grupo, metas["func"], metas["ralenti"]):
-        #    st.write(ins)
-                
-     
-        st.markdown("---")
+if __name__ == "__main__":
+    if st.runtime.exists():
+        main()
+    else:
+        from lote import cli
 
+        sys.exit(cli())
 
 #C:\Users\sacorreac\Downloads\.venv\Scripts\streamlit.exe run C:\Users\sacorreac\Downloads\archivo_maquina\maquinaria.py
 
@@ -0,0 +1,116 @@
+# ============================================================
+#     MEDICIÓN POR ETAPA — ANALÍTICA MAQUINARIA / PROVIDENCIA IPSA
+# ============================================================
+# Tiempo, filas y pico de memoria de cada etapa del pipeline.
+# Se muestra en el panel lateral de diagnóstico y se guarda como JSON lines.
+
+import os
+import json
+import time
+import uuid
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+REGISTRO_RUTA = os.environ.get("MAQUINARIA_REGISTRO", "registro_maquinaria.jsonl")
+
+# El pico de memoria usa tracemalloc, que encarece las asignaciones:
+# por defecto solo se mide cuando se pide (panel de diagnóstico o variable).
+# tracemalloc es uno solo por proceso: las etapas que miden memoria se
+# turnan (varias sesiones del panel o el vigilante esperan a la anterior)
+# y el pico es el del proceso durante la etapa. Lo que corre en el pool
+# de procesos (el parseo de varios exports) no se mide.
+MEDIR_MEMORIA = os.environ.get("MAQUINARIA_MEDIR_MEMORIA", "0") == "1"
+
+_LOCK_ARCHIVO = threading.Lock()
+_LOCK_MEMORIA = threading.RLock()
+
+
+class Registro:
+    """
+    Etapas medidas durante una corrida (un rerun del panel o un lote).
+    """
+
+    def __init__(self, origen, memoria=None, activo=True):
+        self.origen = origen
+        self.corrida = uuid.uuid4().hex[:12]
+        self.memoria = MEDIR_MEMORIA if memoria is None else memoria
+        self.activo = activo
+        self.etapas = []
+        self.escritas = 0
+
+    @contextmanager
+    def etapa(self, nombre, grupo=None, filas_entrada=None, **extra):
+        """
+        Mide el bloque (las etapas no se anidan: comparten el pico de
+        tracemalloc). El dict entregado admite datos de salida:
+        filas_salida, bytes o cualquier otra clave.
+        """
+        datos = {
+            "etapa": nombre, "grupo": grupo,
+            "filas_entrada": filas_entrada, "filas_salida": None, **extra
+        }
+
+        if not self.activo:
+            yield datos
+            return
+
+        memoria = self.memoria
+        if memoria:
+            _LOCK_MEMORIA.acquire()
+            iniciado = not tracemalloc.is_tracing()
+            if iniciado:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+
+        t0 = time.perf_counter()
+        try:
+            yield datos
+        finally:
+            datos["segundos"] = round(time.perf_counter() - t0, 4)
+            if memoria:
+                _, pico = tracemalloc.get_traced_memory()
+                datos["pico_mb"] = round(max(pico - base, 0) / 1024 ** 2, 2)
+                if iniciado:
+                    tracemalloc.stop()
+                _LOCK_MEMORIA.release()
+            self.etapas.append(datos)
+
+    def tabla(self):
+        """
+        Etapas como DataFrame, en el orden en que corrieron.
+        """
+        import pandas as pd
+
+        return pd.DataFrame(self.etapas)
+
+    def escribir(self, ruta=None):
+        """
+        Agrega al registro JSON lines las etapas aún no escritas (una línea
+        por etapa): se puede llamar varias veces, p. ej. tras cada rerun de
+        un fragmento del panel.
+        """
+        nuevas = self.etapas[self.escritas:]
+        if not self.activo or not nuevas:
+            return
+        self.escritas = len(self.etapas)
+
+        marca = time.strftime("%Y-%m-%dT%H:%M:%S")
+        lineas = "".join(
+            json.dumps(
+                {"fecha": marca, "origen": self.origen, "corrida": self.corrida, **e},
+                ensure_ascii=False, default=str
+            ) + "\n"
+            for e in nuevas
+        )
+
+        try:
+            with _LOCK_ARCHIVO, open(ruta or REGISTRO_RUTA, "a", encoding="utf-8") as f:
+                f.write(lineas)
+        except OSError:
+            pass  # sin disco el panel sigue funcionando
+
+
+# Para llamadas sin medición: mismo contrato, no registra nada
+SIN_REGISTRO = Registro("ninguno", activo=False)
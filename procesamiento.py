@@ -0,0 +1,445 @@
+# ============================================================
+#     PROCESAMIENTO — ANALÍTICA MAQUINARIA / PROVIDENCIA IPSA
+# ============================================================
+# Tablas anchas, diagnóstico de flota e insights.
+# Solo depende de pandas/NumPy (sin Streamlit ni Plotly).
+
+import os
+
+import pandas as pd
+import numpy as np
+
+from ingesta import leer_cubo, periodo_de
+
+
+# ============================================================
+# 1. METAS POR GRUPO
+# ============================================================
+
+METAS = {
+    "Fertilización": {"func": 77, "ralenti": 13, "escala": 12},
+    "Preparación":   {"func": 82, "ralenti": 12, "escala": 4.5},
+    "Siembra":       {"func": 72, "ralenti": 15, "escala": 17},
+    "Vinaza":        {"func": 73, "ralenti": 20, "escala": 10},
+}
+
+
+def con_metas(grupos, metas=METAS):
+    """
+    Separa los grupos con metas de los que no tienen (grupos nuevos del
+    maestro): solo los primeros tienen lámina e insights.
+    Devuelve (con metas, sin metas).
+    """
+    return [g for g in grupos if g in metas], [g for g in grupos if g not in metas]
+
+
+# ============================================================
+# 2. PROCESAMIENTO DIARIO
+# ============================================================
+
+# Tabla ancha: una fila por máquina (y fecha o semana cuando aplica),
+# porcentajes por Tipo y horas por Tipo en columnas.
+TIPOS = ["Funcionamiento", "Ralenti", "Transporte"]
+
+COLUMNAS_HORAS_TIPO = {
+    "Funcionamiento": "Horas_Funcionamiento",
+    "Transporte": "Horas_Transporte",
+    "Ralenti": "Horas_Ralenti",
+    "Horas_Motor": "Horas_Motor",
+}
+
+# Horas por Tipo multiplicadas por la escala del grupo (METAS[grupo]["escala"])
+COLUMNAS_HORAS_ESCALADAS = {
+    h: h.replace("Horas_", "HorasEscaladas_") for h in COLUMNAS_HORAS_TIPO.values()
+}
+
+# Cómo se juntan los porcentajes de varias filas (días, archivos, máquinas):
+#   filas -> promedio de los porcentajes del export; cada fila pesa igual
+#   horas -> horas del Tipo / horas de motor (razón de sumas); un turno
+#            corto pesa menos que uno completo
+PONDERACIONES = {
+    "filas": "Promedio de filas",
+    "horas": "Ponderado por horas de motor",
+}
+PONDERACION = os.environ.get("MAQUINARIA_PONDERACION", "filas")
+
+# Columnas de texto repetitivas
+COLUMNAS_CATEGORICAS = ["Máquina", "Grupo_trabajo"]
+
+
+def compactar(df):
+    """
+    Representación compacta de una tabla: textos repetidos como
+    categorías y valores en float32.
+    """
+    for col in df.columns:
+        if col in COLUMNAS_CATEGORICAS:
+            df[col] = df[col].astype("category")
+        elif df[col].dtype == "float64":
+            df[col] = df[col].astype("float32")
+    return df
+
+
+def reporte_memoria(**tablas):
+    """
+    Memoria real (deep) de cada tabla en MB, para el panel lateral.
+    """
+    return pd.DataFrame({
+        "Tabla": list(tablas),
+        "Filas": [len(df) for df in tablas.values()],
+        "MB": [df.memory_usage(deep=True).sum() / 1024 ** 2 for df in tablas.values()],
+    })
+
+
+def porcentajes(acum, ponderacion=None):
+    """
+    Porcentaje por Tipo (una columna por Tipo) de celdas ya sumadas con
+    índice (..., Tipo), según la ponderación (ver PONDERACIONES). Las dos
+    salen de sumas y conteos, así que las celdas de distintos días,
+    archivos o procesos se pueden sumar antes en cualquier orden.
+    """
+    if (ponderacion or PONDERACION) == "horas":
+        # reindex: sin celdas (período vacío) no hay columna Horas_Motor
+        horas = acum["suma_h"].unstack("Tipo").reindex(columns=[*TIPOS, "Horas_Motor"])
+        motor = horas["Horas_Motor"].where(horas["Horas_Motor"] > 0)
+        return horas[TIPOS].div(motor, axis=0) * 100
+
+    pct = (acum["suma_pct"] / acum["n_pct"].where(acum["n_pct"] > 0)).unstack("Tipo")
+    return pct.reindex(columns=TIPOS)
+
+
+def tablas_cubo(celdas, ponderacion=None):
+    """
+    Fusiona celdas del cubo por máquina y devuelve la tabla ancha que
+    consumen gráficos e insights: una fila por máquina con los porcentajes
+    por Tipo, las horas promedio por día (también escaladas por grupo) y
+    las horas de motor del período (el peso de la máquina al ponderar por
+    horas).
+    """
+    acum = (
+        celdas
+        .groupby(["Máquina", "Grupo_trabajo", "Tipo"])
+        [["suma_pct", "n_pct", "suma_h", "n_h"]]
+        .sum()
+    )
+
+    horas = (acum["suma_h"] / acum["n_h"].where(acum["n_h"] > 0)).unstack("Tipo")
+
+    tabla = pd.concat([
+        porcentajes(acum, ponderacion),
+        horas.reindex(columns=list(COLUMNAS_HORAS_TIPO)).rename(columns=COLUMNAS_HORAS_TIPO),
+        acum["suma_h"].unstack("Tipo").reindex(columns=["Horas_Motor"])
+        .rename(columns={"Horas_Motor": "Horas_Motor_Periodo"}),
+    ], axis=1)
+    tabla.columns.name = None
+
+    # Escala de cada grupo como columna mapeada: todos los grupos en una pasada
+    escala = (
+        tabla.index.get_level_values("Grupo_trabajo")
+        .map({g: m.get("escala") for g, m in METAS.items()})
+        .to_numpy(dtype=float)
+    )
+    for horas_tipo, escaladas in COLUMNAS_HORAS_ESCALADAS.items():
+        tabla[escaladas] = tabla[horas_tipo].to_numpy(dtype=float) * escala
+
+    return compactar(tabla.reset_index())
+
+
+class PorGrupo:
+    """
+    Tabla ordenada por Grupo_trabajo con el rango de filas de cada grupo.
+    Tomar un grupo es un slice (sin copiar, O(filas del grupo)), no una
+    máscara sobre toda la tabla. Se usa como dict: grupo -> tramo.
+    """
+
+    def __init__(self, tabla):
+        codigos, grupos = pd.factorize(tabla["Grupo_trabajo"], sort=True)
+        orden = np.argsort(codigos, kind="stable")  # sin grupo (-1) al inicio
+
+        self.tabla = tabla.iloc[orden]
+        codigos = codigos[orden]
+        n = np.arange(len(grupos))
+        self.rangos = dict(zip(
+            grupos,
+            zip(np.searchsorted(codigos, n, "left"), np.searchsorted(codigos, n, "right"))
+        ))
+
+    def __getitem__(self, grupo):
+        inicio, fin = self.rangos.get(grupo, (0, 0))
+        return self.tabla.iloc[inicio:fin]
+
+    def __contains__(self, grupo):
+        return grupo in self.rangos
+
+    def __iter__(self):
+        return iter(self.rangos)
+
+    def __len__(self):
+        return len(self.rangos)
+
+
+def particionar(tabla):
+    """
+    Índice por grupo de una tabla, con un solo ordenamiento.
+    """
+    return PorGrupo(tabla)
+
+
+def tramo(datos, grupo):
+    """
+    Filas de un grupo: el slice del índice si `datos` ya está particionado,
+    una máscara si es una tabla suelta (uso puntual).
+    """
+    if isinstance(datos, PorGrupo):
+        return datos[grupo]
+    return datos[datos["Grupo_trabajo"] == grupo]
+
+
+def preparar_promedio_semanal(df_base, grupo):
+    """
+    Promedio de la base por Máquina (una columna por Tipo)
+    """
+    df_g = tramo(df_base, grupo)
+
+    return df_g.groupby("Máquina", observed=True)[TIPOS].mean()
+
+
+# ------------------------------------------------------------
+# DIAGNÓSTICO DE FLOTA (VECTORIZADO)
+# ------------------------------------------------------------
+
+# Nivel 3: la máquina no tiene porcentajes en el período (celdas en blanco)
+SIN_DATOS = 3
+NIVELES = np.array(["Estable", "En observación", "Crítica", "Sin datos"])
+SEMAFOROS = np.array(["🟢", "🟡", "🔴", "⚪"])
+ESTADOS = np.array([
+    "🟢 Operación bajo control",
+    "🟡 Riesgo operativo moderado",
+    "🔴 Riesgo operativo alto",
+])
+
+
+def _nivel_riesgo(f, r, meta_f, meta_r):
+    """
+    Semáforo como entero: 2 = crítico, 1 = en observación, 0 = estable.
+    """
+    return np.select(
+        [(f < meta_f - 8) | (r > meta_r + 6), (f < meta_f) | (r > meta_r)],
+        [2, 1],
+        default=0
+    )
+
+
+def _tendencia(actual, base, menor_es_mejor=False):
+    """
+    Tendencia vs la base (±3 pp): 1 = mejor, -1 = peor, 0 = en línea.
+    Sin base (NaN) la máquina queda en línea.
+    """
+    delta = actual - base
+    if menor_es_mejor:
+        delta = -delta
+
+    return np.select([delta >= 3, delta <= -3], [1, -1], default=0)
+
+
+def diagnostico_flota(df_actual, df_base, metas=METAS, ponderacion=None):
+    """
+    Semáforo, tendencia e impacto de todas las máquinas de todos los grupos
+    en una sola pasada. df_actual y df_base son tablas anchas
+    (Máquina, Grupo_trabajo, Funcionamiento, Ralenti, Transporte, ...).
+    Devuelve una fila por máquina, incluido el resumen de su grupo
+    (ponderado por horas de motor si así se pide).
+    """
+    claves = ["Grupo_trabajo", "Máquina"]
+
+    # Sin porcentajes (todas las celdas en blanco) la máquina queda en NaN:
+    # sin semáforo de riesgo y al final del ranking, no como 0 % crítica.
+    dia = df_actual.groupby(claves, observed=True)[TIPOS].mean()
+
+    base = (
+        df_base
+        .groupby(claves, observed=True)[TIPOS]
+        .mean()
+        .reindex(index=dia.index)
+    )
+
+    if (ponderacion or PONDERACION) == "horas":
+        # porcentaje × horas de motor = horas del Tipo: razón de sumas del grupo
+        completas = df_actual[TIPOS].notna().all(axis=1)
+        peso = df_actual["Horas_Motor_Periodo"].astype(float).where(completas, 0).fillna(0)
+        claves_grupo = df_actual["Grupo_trabajo"]
+
+        horas_tipo = (
+            df_actual[TIPOS].astype(float)
+            .mul(peso, axis=0)
+            .groupby(claves_grupo, observed=True)
+            .sum()
+        )
+        total = peso.groupby(claves_grupo, observed=True).sum()
+        grupo = horas_tipo.div(total.where(total > 0), axis=0).fillna(0)
+    else:
+        grupo = df_actual.groupby("Grupo_trabajo", observed=True)[TIPOS].mean().fillna(0)
+
+    grupos = dia.index.get_level_values("Grupo_trabajo")
+    meta_f = grupos.map({g: m["func"] for g, m in metas.items()}).to_numpy(dtype=float)
+    meta_r = grupos.map({g: m["ralenti"] for g, m in metas.items()}).to_numpy(dtype=float)
+
+    f = dia["Funcionamiento"].to_numpy(dtype=float)
+    r = dia["Ralenti"].to_numpy(dtype=float)
+    gf = grupo["Funcionamiento"].reindex(grupos).to_numpy(dtype=float)
+    gr = grupo["Ralenti"].reindex(grupos).to_numpy(dtype=float)
+
+    # Sin datos no es "estable": nivel propio, sin impacto (al final del ranking)
+    sin_datos = np.isnan(f) | np.isnan(r)
+    nivel = np.where(sin_datos, SIN_DATOS, _nivel_riesgo(f, r, meta_f, meta_r))
+    impacto = np.where(sin_datos, np.nan, (meta_f - f) + np.fmax(r - meta_r, 0))
+
+    diag = pd.DataFrame({
+        "Funcionamiento": f,
+        "Ralenti": r,
+        "Semáforo": SEMAFOROS[nivel],
+        "Nivel": NIVELES[nivel],
+        "Impacto": impacto,
+        "Tend_F": _tendencia(f, base["Funcionamiento"].to_numpy(dtype=float)),
+        "Tend_R": _tendencia(r, base["Ralenti"].to_numpy(dtype=float), menor_es_mejor=True),
+        "Grupo_F": gf,
+        "Grupo_R": gr,
+        "Estado": _nivel_riesgo(gf, gr, meta_f, meta_r),
+    }, index=dia.index).reset_index()
+
+    return diag
+
+
+def _texto_tendencia(t, base):
+    if t > 0:
+        return f"⬆️ mejor que su promedio {base['adjetivo']}"
+    if t < 0:
+        return f"⬇️ peor que su promedio {base['adjetivo']}"
+    return f"➖ en línea con su {base['nombre']}"
+
+
+def _renderizar_insights(df_diag, grupo, base, titulo_ranking):
+    """
+    Textos ejecutivos de un grupo a partir de la tabla de diagnóstico
+    (particionada o no).
+    """
+    d = tramo(df_diag, grupo)
+
+    insights = []
+
+    # ======================================================
+    # 1. RESUMEN EJECUTIVO DEL GRUPO
+    # ======================================================
+    if d.empty:
+        pf = pr = 0.0
+        estado = ESTADOS[0]
+    else:
+        pf = d["Grupo_F"].iat[0]
+        pr = d["Grupo_R"].iat[0]
+        estado = ESTADOS[d["Estado"].iat[0]]
+
+    insights.append(
+        f"{estado} — Promedio grupo: Funcionamiento {pf:.1f}% | Ralentí {pr:.1f}%."
+    )
+
+    # ======================================================
+    # 2. RANKING DE MÁQUINAS PRIORITARIAS
+    # ======================================================
+    df_crit = d.sort_values("Impacto", ascending=False, kind="stable").head(4)
+
+    if not df_crit.empty:
+        insights.append(titulo_ranking)
+
+        for r in df_crit.itertuples(index=False):
+            if r.Nivel == NIVELES[SIN_DATOS]:
+                insights.append(f"{r.Semáforo} {r.Máquina} — sin datos de utilización en el período")
+                continue
+            insights.append(
+                f"{r.Semáforo} {r.Máquina} — "
+                f"Func {r.Funcionamiento:.1f}% {_texto_tendencia(r.Tend_F, base)} | "
+                f"Ral {r.Ralenti:.1f}% {_texto_tendencia(r.Tend_R, base)} "
+                f"→ {r.Nivel}"
+            )
+    else:
+        insights.append("🚜 Todas las máquinas operan dentro de parámetros esperados.")
+
+    # ======================================================
+    # 3. ACCIÓN OPERATIVA EJECUTIVA
+    # ======================================================
+    if estado.startswith("🔴"):
+        cierre = (
+            "🎯 Acción inmediata: intervenir máquinas críticas con bajo funcionamiento "
+            "y alto ralentí. Priorizar control de tiempos muertos y coordinación operativa."
+        )
+    elif estado.startswith("🟡"):
+        cierre = (
+            "🎯 Acción recomendada: seguimiento diario por máquina en observación "
+            "y validación de causas operativas para evitar escalamiento del riesgo."
+        )
+    else:
+        cierre = (
+            "🎯 Acción recomendada: mantener condiciones operativas actuales "
+            "y monitoreo rutinario del desempeño."
+        )
+
+    insights.append(cierre)
+
+    return insights
+
+
+def insights_diarios(df_diag, grupo):
+    """
+    Insights ejecutivos diarios por grupo y por máquina,
+    incluyendo comparación vs promedio semanal con flechas (±3 pp).
+    """
+    return _renderizar_insights(
+        df_diag, grupo,
+        {"nombre": "semana", "adjetivo": "semanal"},
+        "🚜 Diagnóstico por máquina (prioridad):"
+    )
+
+
+def insights_semanales_operativos(df_diag, grupo):
+    """
+    Insights ejecutivos semanales por grupo y por máquina,
+    incluyendo comparación vs promedio mensual con flechas (±3 pp).
+    """
+    return _renderizar_insights(
+        df_diag, grupo,
+        {"nombre": "mes", "adjetivo": "mensual"},
+        "🚜 Diagnóstico por máquina:"
+    )
+
+
+# ------------------------------------------------------------
+# ANÁLISIS POR PERÍODO (panel y modo lote)
+# ------------------------------------------------------------
+
+# Período -> (grano actual, grano base) del cubo
+PERIODOS = {
+    "Diario vs Semana": ("dia", "semana"),
+    "Semana vs Mes": ("semana", "mes"),
+}
+
+
+def analizar_periodo(fecha_actual, periodo, ponderacion=None):
+    """
+    Tablas actual y base del período leídas del cubo (una lectura para
+    todos los grupos) y diagnóstico de la flota.
+    Devuelve (df_actual, df_base, df_diag).
+    """
+    grano_actual, grano_base = PERIODOS[periodo]
+
+    df_actual = tablas_cubo(leer_cubo(grano_actual, periodo_de(fecha_actual, grano_actual)), ponderacion)
+    df_base = tablas_cubo(leer_cubo(grano_base, periodo_de(fecha_actual, grano_base)), ponderacion)
+
+    return df_actual, df_base, diagnostico_flota(df_actual, df_base, ponderacion=ponderacion)
+
+
+def insights_periodo(df_diag, grupo, periodo):
+    """
+    Insights del grupo según el período de comparación.
+    """
+    if periodo == "Diario vs Semana":
+        return insights_diarios(df_diag, grupo)
+    return insights_semanales_operativos(df_diag, grupo)
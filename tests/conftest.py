@@ -0,0 +1,28 @@
+# ============================================================
+#     TESTS — MAQUINARIA / PROVIDENCIA IPSA
+# ============================================================
+#
+#   python -m pytest -q
+#
+# Casos chicos armados a mano (sin exports reales). El histórico va a un
+# SQLite temporal por test.
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ingesta  # noqa: E402
+
+
+@pytest.fixture
+def historial(tmp_path, monkeypatch):
+    """
+    Histórico vacío en un directorio temporal.
+    """
+    ruta = str(tmp_path / "historial.sqlite")
+    monkeypatch.setattr(ingesta, "HISTORIAL_DB", ruta)
+    return ruta
+
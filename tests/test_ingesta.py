@@ -0,0 +1,202 @@
+# ============================================================
+#     TESTS — INGESTA (fechas, Excel, histórico y cubo)
+# ============================================================
+
+import io
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+import ingesta
+import procesamiento
+
+
+def export(maquina, fecha, func=0.1, horas=2.0):
+    """
+    Export ya cargado (como el de cargar_excel) de una sola fila.
+    """
+    return pd.DataFrame({
+        "Máquina": [maquina],
+        "Fecha de inicio": [pd.Timestamp(fecha)],
+        **{c: [0.1] for c in ingesta.COLUMNAS_HISTORIAL if c.endswith("(%)")},
+        **{c: [horas] for c in ingesta.COLUMNAS_HISTORIAL if c.endswith("(h)")},
+    }).assign(**{"Utilización En funcionamiento (%)": func})
+
+
+def excel(encabezado, filas):
+    """
+    .xlsx en memoria con una hoja.
+    """
+    wb = Workbook()
+    wb.active.append(encabezado)
+    for fila in filas:
+        wb.active.append(fila)
+
+    archivo = io.BytesIO()
+    wb.save(archivo)
+    archivo.seek(0)
+    return archivo
+
+
+# ------------------------------------------------------------
+# FECHAS
+# ------------------------------------------------------------
+
+@pytest.mark.parametrize("textos, formato", [
+    (["14/10/2026", "15/10/2026"], "%d/%m/%Y"),
+    (["2026-10-14", "2026-10-15"], "%Y-%m-%d"),
+    (["14-10-2026"], "%d-%m-%Y"),
+    (["10/14/2026", "10/15/2026"], "%m/%d/%Y"),
+    # Con celdas inválidas gana el formato que entiende más
+    (["2026-10-14", "basura", "2026-10-15"], "%Y-%m-%d"),
+    # Ambiguas: se asume día/mes/año, como exporta Operation Center
+    (["01/02/2026"], "%d/%m/%Y"),
+])
+def test_detectar_formato_fecha(textos, formato):
+    assert ingesta.detectar_formato_fecha(pd.Series(textos)) == formato
+
+
+def test_parsear_fecha_respeta_celdas_fecha():
+    """
+    Las celdas que Excel entrega como fecha no pasan por el formato de
+    texto; las inválidas quedan NaT.
+    """
+    serie = pd.Series([datetime(2026, 3, 1), "02/03/2026", "02/03/2026", "basura", None])
+
+    fechas = ingesta.parsear_fecha(serie)
+
+    assert fechas.tolist()[:3] == [pd.Timestamp("2026-03-01"), pd.Timestamp("2026-03-02"), pd.Timestamp("2026-03-02")]
+    assert fechas[3:].isna().all()
+
+
+def test_normalizar_fechas_semana_iso_entre_anios():
+    """
+    El 1/1/2027 es de la semana 53 del año ISO 2026, pero del mes 2027-01.
+    """
+    df = ingesta.normalizar_fechas(pd.Series(["31/12/2026", "01/01/2027", "04/01/2027"]))
+
+    assert list(df.columns) == ["Fecha de inicio", *ingesta.COLUMNAS_PERIODO]
+    assert df["Semana"].astype(str).tolist() == ["2026-W53", "2026-W53", "2027-W01"]
+    assert df["Año ISO"].tolist() == [2026, 2026, 2027]
+    assert df["Mes"].astype(str).tolist() == ["2026-12", "2027-01", "2027-01"]
+
+
+# ------------------------------------------------------------
+# EXCEL
+# ------------------------------------------------------------
+
+def test_cargar_excel_solo_columnas_requeridas():
+    """
+    Columnas extra (y en otro orden) se descartan, las filas sin máquina
+    se saltan y los valores quedan en float32.
+    """
+    encabezado = ["Modelo", *reversed(ingesta.COLUMNAS_REQUERIDAS), "Combustible (l)"]
+    valores = {c: 0.5 for c in ingesta.COLUMNAS_PCT + ingesta.COLUMNAS_HORAS}
+
+    def fila(maquina, fecha):
+        datos = {**valores, "Máquina": maquina, "Fecha de inicio": fecha}
+        return ["6170J", *(datos[c] for c in reversed(ingesta.COLUMNAS_REQUERIDAS)), 80.0]
+
+    archivo = excel(encabezado, [
+        fila(" X1 ", "14/10/2026"),
+        fila(None, "15/10/2026"),
+        fila("X2", "15/10/2026"),
+    ])
+
+    df, _ = ingesta.cargar_excel(archivo)
+
+    assert list(df.columns) == [
+        "Máquina", "Fecha de inicio", *ingesta.COLUMNAS_PERIODO,
+        *ingesta.COLUMNAS_PCT, *ingesta.COLUMNAS_HORAS,
+    ]
+    assert df["Máquina"].tolist() == ["X1", "X2"]
+    assert df["Fecha de inicio"].tolist() == [pd.Timestamp("2026-10-14"), pd.Timestamp("2026-10-15")]
+    assert (df[ingesta.COLUMNAS_PCT + ingesta.COLUMNAS_HORAS].dtypes == "float32").all()
+
+
+def test_cargar_excel_columnas_faltantes():
+    archivo = excel(["Máquina", "Fecha de inicio"], [["X1", "14/10/2026"]])
+
+    with pytest.raises(ValueError, match="Utilización"):
+        ingesta.cargar_excel(archivo)
+
+
+def test_cargar_excel_archivo_invalido():
+    with pytest.raises(ValueError, match="no es un Excel"):
+        ingesta.cargar_excel(io.BytesIO(b"no es un zip"))
+
+
+# ------------------------------------------------------------
+# HISTÓRICO Y CUBO
+# ------------------------------------------------------------
+
+def celdas_funcionamiento(grano, periodo):
+    celdas = ingesta.leer_cubo(grano, periodo)
+    return celdas[celdas["Tipo"] == "Funcionamiento"].set_index("Máquina")
+
+
+def test_reexport_corregido(historial):
+    """
+    Un re-export corregido de la misma (Máquina, Fecha) reemplaza al
+    original en el histórico y en el cubo; el mismo contenido con otro
+    hash no cambia nada.
+    """
+    assert ingesta.registrar_historial(export("X1", "2026-10-14", func=0.5), "original") == 1
+    assert ingesta.registrar_historial(export("X1", "2026-10-14", func=0.8), "corregido") == 1
+    assert ingesta.registrar_historial(export("X1", "2026-10-14", func=0.8), "copia") == 0
+    assert ingesta.registrar_historial(export("X1", "2026-10-14", func=0.1), "original") == 0
+
+    func = celdas_funcionamiento("semana", "2026-W42")
+    assert func[["suma_pct", "n_pct"]].values.tolist() == [[80.0, 1]]
+
+
+def test_cubo_combina_archivos(historial):
+    """
+    Las celdas de archivos distintos se suman: la semana promedia los días
+    de los dos exports y el mes también, sin releer el histórico.
+    """
+    maquina = ingesta.maestro().df["Máquina"].iloc[0]
+    grupo = ingesta.maestro().grupos[maquina]
+
+    ingesta.registrar_historial(export(maquina, "2026-10-13", func=0.6, horas=2.0), "lunes")
+    ingesta.registrar_historial(export(maquina, "2026-10-14", func=0.8, horas=4.0), "martes")
+
+    assert celdas_funcionamiento("dia", "2026-10-13").at[maquina, "suma_pct"] == pytest.approx(60.0)
+
+    for grano, periodo in [("semana", "2026-W42"), ("mes", "2026-10")]:
+        func = celdas_funcionamiento(grano, periodo)
+        assert func.at[maquina, "suma_pct"] == pytest.approx(140.0)
+        assert func.at[maquina, "n_pct"] == 2
+        assert func.at[maquina, "suma_h"] == pytest.approx(6.0)
+        assert func.at[maquina, "Grupo_trabajo"] == grupo
+
+    tabla = procesamiento.tablas_cubo(ingesta.leer_cubo("semana", "2026-W42"), "filas")
+    fila = tabla.set_index("Máquina").loc[maquina]
+    assert fila["Funcionamiento"] == pytest.approx(70.0)
+    assert fila["Horas_Funcionamiento"] == pytest.approx(3.0)
+    assert fila["HorasEscaladas_Funcionamiento"] == pytest.approx(3.0 * procesamiento.METAS[grupo]["escala"])
+
+
+def test_cubo_descuenta_filas(historial):
+    """
+    Sumar y después descontar (signo=-1) las mismas filas deja las celdas
+    en cero.
+    """
+    ingesta.registrar_historial(export("X1", "2026-10-14", func=0.5), "base")
+    filas = export("X2", "2026-10-14", func=0.7).rename(columns=ingesta.COLUMNAS_HISTORIAL)
+    filas = filas[list(ingesta.COLUMNAS_HISTORIAL.values())].assign(fecha="2026-10-14")
+
+    with closing(sqlite3.connect(historial)) as con, con:
+        ingesta.actualizar_cubo(con, filas)
+    assert celdas_funcionamiento("dia", "2026-10-14").at["X2", "n_pct"] == 1
+
+    with closing(sqlite3.connect(historial)) as con, con:
+        ingesta.actualizar_cubo(con, filas, signo=-1)
+
+    func = celdas_funcionamiento("dia", "2026-10-14")
+    assert func.loc["X2", ["suma_pct", "n_pct", "suma_h", "n_h"]].tolist() == [0, 0, 0, 0]
+    assert func.loc["X1", ["suma_pct", "n_pct"]].tolist() == [50.0, 1]
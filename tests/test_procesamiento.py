@@ -0,0 +1,77 @@
+# ============================================================
+#     TESTS — PROCESAMIENTO (tablas, grupos y diagnóstico)
+# ============================================================
+
+import numpy as np
+import pandas as pd
+
+import ingesta
+import procesamiento
+
+
+def tabla_ancha(filas):
+    """
+    Tabla ancha (como la de tablas_cubo) a partir de
+    (Máquina, Grupo_trabajo, Funcionamiento, Ralenti, Transporte).
+    """
+    df = pd.DataFrame(filas, columns=["Máquina", "Grupo_trabajo", *procesamiento.TIPOS])
+    df["Horas_Motor_Periodo"] = 10.0
+    return procesamiento.compactar(df)
+
+
+def test_maquina_sin_porcentajes():
+    """
+    Una máquina con todas las celdas % en blanco no es 0 % crítica:
+    queda sin semáforo de riesgo y al final del ranking.
+    """
+    actual = tabla_ancha([
+        ("A", "Siembra", 70.0, 16.0, 14.0),
+        ("B", "Siembra", np.nan, np.nan, np.nan),
+    ])
+    diag = procesamiento.diagnostico_flota(actual, actual.iloc[:0]).set_index("Máquina")
+
+    assert diag.at["B", "Nivel"] == "Sin datos"
+    assert diag.at["B", "Semáforo"] == "⚪"
+    assert np.isnan(diag.at["B", "Impacto"])
+
+    ranking = procesamiento.insights_diarios(diag.reset_index(), "Siembra")[2:4]
+    assert ranking[0].startswith("🟡 A")
+    assert ranking[1].startswith("⚪ B") and "nan" not in ranking[1]
+
+
+def test_periodo_vacio_por_horas(historial):
+    """
+    Un período sin celdas da una tabla vacía con las dos ponderaciones.
+    """
+    celdas = ingesta.leer_cubo("dia", "1999-01-01")
+
+    for ponderacion in procesamiento.PONDERACIONES:
+        tabla = procesamiento.tablas_cubo(celdas, ponderacion)
+        assert tabla.empty and set(procesamiento.TIPOS) <= set(tabla.columns)
+
+
+def test_por_grupo_tramos():
+    """
+    Cada grupo es el mismo conjunto de filas que la máscara, en el orden
+    original; las máquinas sin grupo no forman tramo.
+    """
+    tabla = tabla_ancha([
+        ("A1", "Siembra", 70.0, 16.0, 14.0),
+        ("B1", "Preparación", 80.0, 10.0, 10.0),
+        ("S1", np.nan, 50.0, 25.0, 25.0),
+        ("A2", "Siembra", 60.0, 20.0, 20.0),
+        ("B2", "Preparación", 85.0, 5.0, 10.0),
+    ])
+
+    por_grupo = procesamiento.particionar(tabla)
+
+    assert list(por_grupo) == ["Preparación", "Siembra"]
+    assert len(por_grupo) == 2
+    for grupo in por_grupo:
+        pd.testing.assert_frame_equal(
+            por_grupo[grupo], procesamiento.tramo(tabla, grupo)
+        )
+    assert por_grupo["Siembra"]["Máquina"].tolist() == ["A1", "A2"]
+
+    assert "Vinaza" not in por_grupo
+    assert por_grupo["Vinaza"].empty
@@ -0,0 +1,270 @@
+# ============================================================
+#     VIGILANTE DE CARPETA — ANALÍTICA MAQUINARIA / PROVIDENCIA IPSA
+# ============================================================
+#
+#   MAQUINARIA_CARPETA=/ruta/exports streamlit run maquinaria.py
+#   python vigilante.py --carpeta /ruta/exports            (servicio aparte)
+#   python vigilante.py --carpeta /ruta/exports --una-vez  (cron)
+#
+# Revisa la carpeta donde llegan los exports de Operation Center y, en un
+# hilo de fondo, ingiere cada .xlsx nuevo (lectura, maestro, histórico y
+# cubo). Al terminar deja una instantánea del último día en el caché:
+# el panel la lee directamente, sin esperar a que alguien suba archivos.
+
+import os
+import sys
+import json
+import time
+import threading
+import traceback
+
+import pandas as pd
+
+import ingesta
+from ingesta import cargar_varios, leer_historial, registrar_historial, ultima_fecha_historial
+from lote import abrir_archivo, archivos_carpeta
+from medicion import Registro
+
+CARPETA = os.environ.get("MAQUINARIA_CARPETA")
+INTERVALO = float(os.environ.get("MAQUINARIA_INTERVALO", "30"))
+
+# Un archivo se toma cuando lleva este tiempo sin cambiar (copia terminada)
+ESPERA = float(os.environ.get("MAQUINARIA_ESPERA", "5"))
+
+
+# ------------------------------------------------------------
+# INSTANTÁNEA — último día listo para el panel
+# ------------------------------------------------------------
+
+def rutas_instantanea():
+    # En una subcarpeta: podar_cache solo recorre la raíz del caché
+    base = os.path.join(ingesta.CACHE_DIR, "vigilante", "instantanea")
+    return f"{base}.parquet", f"{base}.json"
+
+
+def escribir_instantanea(archivos):
+    """
+    Guarda las filas del último día del histórico (ya unidas al maestro)
+    y sus datos de origen. Se escribe a temporales y se reemplaza, así el
+    panel nunca lee una instantánea a medias.
+    """
+    fecha = ultima_fecha_historial()
+    if fecha is None:
+        return None
+
+    df = leer_historial(fecha, fecha)
+    meta = {
+        "fecha": fecha.strftime("%Y-%m-%d"),
+        "actualizado": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "archivos": archivos,
+        "filas": len(df),
+        "version": ingesta.VERSION_CACHE,
+    }
+
+    ruta_df, ruta_meta = rutas_instantanea()
+    os.makedirs(os.path.dirname(ruta_df), exist_ok=True)
+    sufijo = f".{os.getpid()}.tmp"
+
+    df.to_parquet(ruta_df + sufijo, index=False)
+    with open(ruta_meta + sufijo, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    os.replace(ruta_df + sufijo, ruta_df)
+    os.replace(ruta_meta + sufijo, ruta_meta)
+
+    return meta
+
+
+def meta_instantanea():
+    """
+    Datos de la instantánea vigente, o None si no hay o es de otra
+    versión del caché.
+    """
+    try:
+        with open(rutas_instantanea()[1], encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    return meta if meta.get("version") == ingesta.VERSION_CACHE else None
+
+
+def leer_instantanea():
+    """
+    (df, meta) de la última instantánea, o (None, None) si no hay.
+    """
+    meta = meta_instantanea()
+    if meta is None:
+        return None, None
+
+    try:
+        return pd.read_parquet(rutas_instantanea()[0]), meta
+    except (OSError, ValueError):
+        return None, None
+
+
+# ------------------------------------------------------------
+# VIGILANTE
+# ------------------------------------------------------------
+
+class Vigilante(threading.Thread):
+    """
+    Hilo de fondo que ingiere los exports nuevos de una carpeta.
+    Un archivo cuenta como nuevo si cambió su fecha o tamaño; solo se toma
+    cuando lleva ESPERA segundos sin modificarse.
+    """
+
+    def __init__(self, carpeta, intervalo=INTERVALO):
+        super().__init__(name="vigilante-maquinaria", daemon=True)
+        self.carpeta = carpeta
+        self.intervalo = intervalo
+        self.vistos = {}
+        self.estado = {"archivos": 0, "ultima_revision": None, "error": None}
+        self._parar = threading.Event()
+
+    def nuevos(self):
+        """
+        Rutas nuevas o modificadas y ya estables, con su marca (mtime, tamaño).
+        """
+        ahora = time.time()
+        listos = []
+
+        for ruta in archivos_carpeta(self.carpeta):
+            try:
+                info = os.stat(ruta)
+            except OSError:
+                continue  # se borró entre el listado y el stat
+
+            marca = (info.st_mtime_ns, info.st_size)
+            if self.vistos.get(ruta) != marca and ahora - info.st_mtime >= ESPERA:
+                listos.append((ruta, marca))
+
+        return listos
+
+    def revisar(self):
+        """
+        Una pasada: ingiere lo nuevo y actualiza la instantánea.
+        Devuelve cuántos archivos ingirió.
+        """
+        listos = self.nuevos()
+        self.estado["ultima_revision"] = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        if not listos:
+            return 0
+
+        registro = Registro("vigilante")
+        errores = []
+        try:
+            try:
+                nombres, nuevas = self.ingerir(listos, registro)
+            except ValueError:
+                # Un archivo inválido no frena a los demás: uno por uno, y el
+                # inválido se da por visto hasta que vuelva a cambiar.
+                nombres, nuevas = [], 0
+                for item in listos:
+                    try:
+                        n, f = self.ingerir([item], registro)
+                        nombres += n
+                        nuevas += f
+                    except ValueError as err:
+                        errores.append(str(err))
+                        self.vistos[item[0]] = item[1]
+
+            # Archivos ya ingeridos (p. ej. al reiniciar) no cambian la instantánea
+            if nuevas or (nombres and meta_instantanea() is None):
+                with registro.etapa("instantanea", filas_entrada=len(nombres)) as e:
+                    meta = escribir_instantanea(nombres)
+                    e["filas_salida"] = meta["filas"] if meta else 0
+        except OSError as err:
+            # se reintenta en la próxima pasada (p. ej. un archivo aún bloqueado)
+            errores.append(str(err))
+            nombres = []
+        finally:
+            registro.escribir()
+
+        self.estado["archivos"] += len(nombres)
+        self.estado["error"] = "; ".join(errores) or None
+
+        return len(nombres)
+
+    def ingerir(self, listos, registro):
+        """
+        Lectura (en paralelo), maestro e histórico de los archivos listos.
+        Devuelve sus nombres y las filas nuevas en el histórico.
+        """
+        cargas, _ = cargar_varios([abrir_archivo(r) for r, _ in listos], registro)
+
+        nuevas = 0
+        for archivo, df, _, clave in cargas:
+            with registro.etapa("registrar_historial", filas_entrada=len(df), archivo=archivo.name) as e:
+                e["filas_salida"] = registrar_historial(df, clave)
+                nuevas += e["filas_salida"]
+
+        self.vistos.update(listos)
+        return [archivo.name for archivo, _, _, _ in cargas], nuevas
+
+    def run(self):
+        while not self._parar.is_set():
+            try:
+                self.revisar()
+            except Exception as err:
+                # Cualquier otra falla (SQLite bloqueado, un caché dañado...)
+                # queda en el estado y se reintenta en la próxima pasada:
+                # el hilo no debe morir en silencio.
+                self.estado["error"] = f"{type(err).__name__}: {err}"
+                traceback.print_exc()
+            self._parar.wait(self.intervalo)
+
+    def detener(self):
+        self._parar.set()
+
+
+_VIGILANTE = {"lock": threading.Lock(), "hilo": None}
+
+
+def iniciar_vigilante(carpeta=None):
+    """
+    Arranca el vigilante de la carpeta configurada, una sola vez por proceso.
+    Devuelve el hilo, o None si no hay carpeta configurada.
+    """
+    carpeta = carpeta or CARPETA
+    if not carpeta:
+        return None
+
+    with _VIGILANTE["lock"]:
+        if _VIGILANTE["hilo"] is None or not _VIGILANTE["hilo"].is_alive():
+            _VIGILANTE["hilo"] = Vigilante(carpeta)
+            _VIGILANTE["hilo"].start()
+        return _VIGILANTE["hilo"]
+
+
+def cli(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="vigilante",
+        description="Ingiere en segundo plano los exports nuevos de una carpeta."
+    )
+    parser.add_argument("--carpeta", default=CARPETA, required=CARPETA is None)
+    parser.add_argument("--intervalo", type=float, default=INTERVALO, help="segundos entre revisiones")
+    parser.add_argument("--una-vez", action="store_true", help="una sola pasada y salir")
+    args = parser.parse_args(argv)
+
+    vigilante = Vigilante(args.carpeta, args.intervalo)
+
+    if args.una_vez:
+        n = vigilante.revisar()
+        print(f"{n} archivo(s) ingeridos{': ' + vigilante.estado['error'] if vigilante.estado['error'] else ''}")
+        return 1 if vigilante.estado["error"] else 0
+
+    print(f"Vigilando {args.carpeta} cada {args.intervalo:.0f} s (Ctrl+C para salir)")
+    try:
+        vigilante.run()
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())